@@ -0,0 +1,79 @@
+# circuit_breaker.py
+"""
+Circuit breaker for external APIs
+Stops calling a failing API for a while so callers fail fast during outages
+"""
+import time
+import threading
+
+
+class CircuitOpen(Exception):
+    """Raised when a call is refused because the circuit is open"""
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker that trips after consecutive failures"""
+
+    def __init__(self, fail_threshold: int = 5, reset_after: float = 120):
+        """
+        Args:
+            fail_threshold: Consecutive failures before the circuit opens
+            reset_after: Seconds to stay open before allowing a trial call
+        """
+        self.fail_threshold = fail_threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being refused"""
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_after
+
+    def _check(self):
+        """Raise CircuitOpen if calls are currently being refused"""
+        if self.is_open:
+            raise CircuitOpen()
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_threshold or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+
+    def _record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Call fn unless the circuit is open
+
+        Once reset_after has passed, calls go through again; one more failure
+        re-opens the circuit, a success closes it.
+
+        Raises:
+            CircuitOpen: If the circuit is open
+        """
+        self._check()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._record_failure()
+            raise
+        self._record_success()
+        return result
+
+    async def call_async(self, fn, *args, **kwargs):
+        """Await coroutine function fn unless the circuit is open (see call)"""
+        self._check()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception:
+            self._record_failure()
+            raise
+        self._record_success()
+        return result
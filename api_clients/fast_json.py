@@ -0,0 +1,11 @@
+# fast_json.py
+"""
+JSON decoding for API responses
+Uses orjson when installed (several times faster), otherwise stdlib json
+"""
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    import json
+    loads = json.loads
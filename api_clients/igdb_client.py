@@ -2,17 +2,35 @@
 import sys
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from .igdb_token_manager import get_valid_access_token
+from .fast_json import loads
 
 load_dotenv()
 
 class IGDBClient:
     """Client for making requests to the IGDB API"""
     
-    def __init__(self):
+    def __init__(self, timeout=(3, 7)):
         self.client_id = os.getenv('TWITCH_CLIENT_ID')
         self.base_url = 'https://api.igdb.com/v4'
+        self.timeout = timeout  # (connect, read) seconds
+        
+        # Keep-alive session; IGDB queries are read-only, so POSTs are safe to retry
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[429, 502, 503, 504],
+                allowed_methods=['POST'],
+                raise_on_status=False
+            )
+        ))
         self.access_token = None
         self._refresh_token()
     
@@ -41,26 +59,28 @@ class IGDBClient:
         url = f'{self.base_url}/{endpoint}'
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 url,
                 headers=self._get_headers(),
-                data=query_body
+                data=query_body,
+                timeout=self.timeout
             )
             response.raise_for_status()
-            return response.json()
+            return loads(response.content)
             
         except requests.exceptions.HTTPError as e:
             if response.status_code == 401:
                 # Token expired, refresh and retry
                 print('🔄 Token expired, refreshing...')
                 self._refresh_token()
-                response = requests.post(
+                response = self.session.post(
                     url,
                     headers=self._get_headers(),
-                    data=query_body
+                    data=query_body,
+                    timeout=self.timeout
                 )
                 response.raise_for_status()
-                return response.json()
+                return loads(response.content)
             else:
                 raise
     
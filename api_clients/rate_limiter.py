@@ -0,0 +1,50 @@
+# rate_limiter.py
+"""
+Client-side rate limiting for external APIs
+Keeps request rates under provider limits so we never trigger 429 backoff
+"""
+import time
+import asyncio
+import threading
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter"""
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Args:
+            rate: Tokens added per second (sustained requests per second)
+            capacity: Maximum tokens stored (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Take a token, going into debt if none are available
+
+        Returns:
+            Seconds to wait before the reserved token may be used
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        """Block until a request may be made"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be made"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
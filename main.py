@@ -15,7 +15,7 @@ from dotenv import load_dotenv
 from pathlib import Path
 
 # Import all modules
-from src.supabase_client import SupabaseClient
+from src.supabase_client import get_supabase_client
 from src.twitch_handler import TwitchHandler
 from src.downloader import VODDownloader
 from src.game_metadata_handler import GameMetadataHandler
@@ -48,7 +48,7 @@ class AutomationOrchestrator:
         logger.info('='*60)
         
         # Initialize database
-        self.db = SupabaseClient()
+        self.db = get_supabase_client()
         
         # Initialize all handlers
         self.twitch_handler = TwitchHandler(self.db)
@@ -343,6 +343,14 @@ class AutomationOrchestrator:
         """Cleanup resources"""
         logger.info('🧹 Cleaning up resources...')
         
+        # Let background metadata refreshes finish writing
+        await self.metadata_handler.wait_for_refreshes()
+        await self.youtube_handler.metadata_handler.wait_for_refreshes()
+        
+        # Close metadata HTTP clients
+        await self.metadata_handler.close()
+        await self.youtube_handler.metadata_handler.close()
+        
         # Close Twitch handler
         if hasattr(self.twitch_handler, 'close'):
             await self.twitch_handler.close()
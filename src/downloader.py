@@ -6,16 +6,18 @@ then cleans up local files. Runs after twitch_handler creates download tasks.
 """
 
 import os
+import time
+import shutil
 import subprocess
 import logging
 import boto3
 from botocore.exceptions import ClientError
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from dotenv import load_dotenv
 
-from src.supabase_client import SupabaseClient
+from src.supabase_client import SupabaseClient, get_supabase_client
 
 load_dotenv()
 
@@ -50,7 +52,10 @@ class VODDownloader:
         else:
             self.do_spaces_region = 'nyc3'
         
-        self.db = db_client or SupabaseClient()
+        self.db = db_client or get_supabase_client()
+        
+        # Cached S3 date prefix: (minute bucket, 'YYYY/MM')
+        self._prefix_cache = (None, '')
         
         # Initialize boto3 S3 client for DO Spaces
         if self.do_spaces_key and self.do_spaces_secret:
@@ -137,17 +142,18 @@ class VODDownloader:
             ]
             
             # Run streamlink
+            # Binary mode: only the lines we log get decoded
             process = subprocess.Popen(
                 cmd,
-                stdout=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
-                universal_newlines=True
+                bufsize=1024 * 1024
             )
             
             # Stream output for progress logging
-            for line in process.stderr:
-                if 'Writing output to' in line or 'MB' in line:
-                    logger.info(f'   {line.strip()}')
+            for raw in iter(process.stderr.readline, b''):
+                if b'Writing output to' in raw or b'MB' in raw:
+                    logger.info(f'   {raw.decode("utf-8", "replace").strip()}')
             
             # Wait for completion
             return_code = process.wait()
@@ -191,17 +197,18 @@ class VODDownloader:
             ]
             
             # Run yt-dlp
+            # Binary mode: only the lines we log get decoded
             process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                universal_newlines=True
+                bufsize=1024 * 1024
             )
             
             # Stream output for progress logging
-            for line in process.stdout:
-                if 'Downloading' in line or 'ETA' in line:
-                    logger.info(f'   {line.strip()}')
+            for raw in iter(process.stdout.readline, b''):
+                if b'Downloading' in raw or b'ETA' in raw:
+                    logger.info(f'   {raw.decode("utf-8", "replace").strip()}')
             
             # Wait for completion
             return_code = process.wait()
@@ -220,13 +227,111 @@ class VODDownloader:
             logger.error(f'❌ yt-dlp error: {e}')
             return False
     
-    def upload_to_spaces(self, local_file_path: str, twitch_vod_id: str) -> Optional[str]:
+    def _get_date_prefix(self) -> str:
+        """
+        Get the S3 date prefix, recomputed at most once per minute
+        
+        Returns:
+            Date prefix string (e.g., "2024/10")
+        """
+        minute = int(time.time() // 60)
+        if self._prefix_cache[0] != minute:
+            self._prefix_cache = (minute, datetime.now().strftime('%Y/%m'))
+        return self._prefix_cache[1]
+    
+    def download_batch_with_ytdlp(self, jobs: List[Tuple[str, str]]) -> Dict[str, bool]:
+        """
+        Download several VODs with a single yt-dlp process (fallback method)
+        
+        URLs are fed to yt-dlp's batch file on stdin so the interpreter and
+        extractors are only loaded once for the whole batch.
+        
+        Args:
+            jobs: List of (vod_url, output_path) tuples
+        
+        Returns:
+            Dictionary mapping vod_url to True if downloaded to its output_path
+        """
+        results = {vod_url: False for vod_url, _ in jobs}
+        
+        try:
+            logger.info(f'🔽 Downloading {len(jobs)} VODs with yt-dlp (batch)')
+            
+            # yt-dlp command
+            # .part files are kept so only completed downloads reach the final name
+            cmd = [
+                'yt-dlp',
+                '--batch-file', '-',
+                '--format', 'best',
+                '--output', os.path.join(self.temp_dir, 'ytdlp_%(id)s.%(ext)s'),
+                '--no-mtime',  # Don't restore file modification time
+            ]
+            
+            # Run yt-dlp
+            # Binary mode: only the lines we log or parse get decoded
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=1024 * 1024
+            )
+            
+            # Feed the batch of URLs
+            process.stdin.write(''.join(f'{vod_url}\n' for vod_url, _ in jobs).encode('utf-8'))
+            process.stdin.close()
+            
+            # Track where each VOD is written, keyed by yt-dlp's video ID
+            destinations = {}
+            for raw in iter(process.stdout.readline, b''):
+                if b'[download] Destination:' in raw:
+                    line = raw.decode('utf-8', 'replace').strip()
+                    path = line.split('Destination:', 1)[1].strip()
+                elif raw.rstrip().endswith(b'has already been downloaded'):
+                    line = raw.decode('utf-8', 'replace').strip()
+                    path = line.split('[download]', 1)[1][:-len('has already been downloaded')].strip()
+                else:
+                    if b'ETA' in raw:
+                        logger.info(f'   {raw.decode("utf-8", "replace").strip()}')
+                    continue
+                
+                logger.info(f'   {line}')
+                video_id = os.path.splitext(os.path.basename(path))[0][len('ytdlp_'):]
+                destinations[video_id.lstrip('v')] = path
+            
+            # Wait for completion (non-zero if any VOD in the batch failed)
+            return_code = process.wait()
+            if return_code != 0:
+                logger.warning(f'⚠️  yt-dlp batch exited with code {return_code}')
+            
+            # Move each completed file to the output path its download record expects
+            for vod_url, output_path in jobs:
+                path = destinations.get(vod_url.rsplit('/', 1)[-1])
+                if path and os.path.exists(path):
+                    os.replace(path, output_path)
+                    results[vod_url] = True
+                    logger.info(f'✅ Download completed: {output_path}')
+                else:
+                    logger.error(f'❌ yt-dlp failed for {vod_url}')
+            
+            return results
+                
+        except FileNotFoundError:
+            logger.error('❌ yt-dlp not found. Install with: pip install yt-dlp')
+            return results
+        except Exception as e:
+            logger.error(f'❌ yt-dlp error: {e}')
+            return results
+    
+    def upload_to_spaces(self, local_file_path: str, twitch_vod_id: str,
+                         file_size: Optional[int] = None) -> Optional[str]:
         """
         Upload file to Digital Ocean Spaces
         
         Args:
             local_file_path: Path to local file
             twitch_vod_id: Twitch VOD ID for naming
+            file_size: Size of the file in bytes, if already known (skips a stat)
         
         Returns:
             Public URL of uploaded file, or None if failed
@@ -238,13 +343,13 @@ class VODDownloader:
         try:
             # Generate S3 key (path in bucket): vods/2024/10/vod_12345.mp4
             file_name = os.path.basename(local_file_path)
-            date_prefix = datetime.now().strftime('%Y/%m')
-            s3_key = f"vods/{date_prefix}/{file_name}"
+            s3_key = f"vods/{self._get_date_prefix()}/{file_name}"
             
             logger.info(f'☁️  Uploading to DO Spaces: {s3_key}')
             
             # Upload file with progress callback
-            file_size = os.path.getsize(local_file_path)
+            if file_size is None:
+                file_size = os.path.getsize(local_file_path)
             uploaded = 0
             
             def progress_callback(bytes_uploaded):
@@ -287,43 +392,57 @@ class VODDownloader:
             bool: True if deleted successfully
         """
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.info(f'🗑️  Deleted local file: {file_path}')
-                return True
+            os.remove(file_path)
+            logger.info(f'🗑️  Deleted local file: {file_path}')
+            return True
+        except FileNotFoundError:
             return False
         except Exception as e:
             logger.error(f'❌ Error deleting file: {e}')
             return False
     
-    def get_file_size_mb(self, file_path: str) -> float:
+    def disk_slots(self) -> int:
+        """
+        Count how many max-size VODs the temp directory can hold right now
+        
+        Returns:
+            Number of VODs that fit, with the same 10% headroom as check_disk_space
+        """
+        free = shutil.disk_usage(self.temp_dir).free
+        return free // int(self.max_size_gb * 1024**3 * 1.1)
+    
+    def check_disk_space(self, download_ids: List[str]) -> bool:
         """
-        Get file size in megabytes
+        Make sure the temp directory can hold a max-size VOD before downloading
         
         Args:
-            file_path: Path to file
+            download_ids: Database download record IDs (all marked failed in one update if short on space)
         
         Returns:
-            File size in MB
+            bool: True if there is enough free space
         """
-        try:
-            size_bytes = os.path.getsize(file_path)
-            size_mb = size_bytes / (1024 * 1024)
-            return round(size_mb, 2)
-        except Exception as e:
-            logger.error(f'❌ Error getting file size: {e}')
-            return 0.0
+        free = shutil.disk_usage(self.temp_dir).free
+        need = int(self.max_size_gb * 1024**3 * 1.1)  # 10% headroom
+        
+        if free < need:
+            error_msg = f'Insufficient disk: {free // 1024**3}GB free'
+            logger.error(f'❌ {error_msg} (need {need // 1024**3}GB)')
+            self.db.mark_downloads_failed(download_ids, error_msg)
+            return False
+        
+        return True
     
-    def download_vod(self, download_record: Dict[str, Any], stream_record: Dict[str, Any]) -> bool:
+    def start_download(self, download_record: Dict[str, Any],
+                       stream_record: Dict[str, Any]) -> Tuple[str, str, bool]:
         """
-        Download a single VOD
+        Mark a download as started and try streamlink (primary method)
         
         Args:
             download_record: Database download record
             stream_record: Database stream record
         
         Returns:
-            bool: True if successful, False otherwise
+            Tuple of (vod_url, output_path, success)
         """
         download_id = download_record['id']
         twitch_vod_id = stream_record['twitch_vod_id']
@@ -339,16 +458,35 @@ class VODDownloader:
         vod_url = self.get_vod_url(twitch_vod_id)
         output_path = self.get_output_path(twitch_vod_id, stream_title)
         
-        # Try streamlink first, fallback to yt-dlp
+        # Try streamlink first
         success = self.download_with_streamlink(vod_url, output_path)
         
-        if not success:
-            logger.warning('⚠️  Streamlink failed, trying yt-dlp...')
-            success = self.download_with_ytdlp(vod_url, output_path)
+        return vod_url, output_path, success
+    
+    def finish_download(self, download_id: str, twitch_vod_id: str,
+                        output_path: str, success: bool) -> bool:
+        """
+        Validate a downloaded VOD, upload it to DO Spaces and update the database
+        
+        Args:
+            download_id: Database download record ID
+            twitch_vod_id: Twitch VOD ID
+            output_path: Where the VOD was downloaded to
+            success: Whether the downloader reported success
         
-        if success and os.path.exists(output_path):
-            # Get file size
-            file_size_mb = self.get_file_size_mb(output_path)
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        # Stat the file once; a missing file means the download didn't produce output
+        file_size_bytes = None
+        if success:
+            try:
+                file_size_bytes = os.stat(output_path).st_size
+            except OSError:
+                pass
+        
+        if file_size_bytes is not None:
+            file_size_mb = round(file_size_bytes / (1024 * 1024), 2)
             
             # Check if file size is reasonable
             if file_size_mb < 10:  # Less than 10 MB is suspicious
@@ -365,7 +503,7 @@ class VODDownloader:
             
             # Upload to DO Spaces
             logger.info('☁️  Uploading to Digital Ocean Spaces...')
-            spaces_url = self.upload_to_spaces(output_path, twitch_vod_id)
+            spaces_url = self.upload_to_spaces(output_path, twitch_vod_id, file_size_bytes)
             
             if not spaces_url:
                 logger.error('❌ Upload to DO Spaces failed')
@@ -390,6 +528,33 @@ class VODDownloader:
             self.db.mark_download_failed(download_id, error_msg)
             return False
     
+    def download_vod(self, download_record: Dict[str, Any], stream_record: Dict[str, Any]) -> bool:
+        """
+        Download a single VOD
+        
+        Args:
+            download_record: Database download record
+            stream_record: Database stream record
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.check_disk_space([download_record['id']]):
+            return False
+        
+        vod_url, output_path, success = self.start_download(download_record, stream_record)
+        
+        if not success:
+            logger.warning('⚠️  Streamlink failed, trying yt-dlp...')
+            success = self.download_with_ytdlp(vod_url, output_path)
+        
+        return self.finish_download(
+            download_record['id'],
+            stream_record['twitch_vod_id'],
+            output_path,
+            success
+        )
+    
     def process_pending_downloads(self) -> Dict[str, int]:
         """
         Process all pending downloads
@@ -399,31 +564,87 @@ class VODDownloader:
         """
         logger.info('🚀 Starting download processing...')
         
-        # Get pending downloads with stream data
-        pending = self.db.get_pending_downloads()
-        
-        if not pending:
-            logger.info('💤 No pending downloads')
-            return {'successful': 0, 'failed': 0, 'total': 0}
+        stats = {'successful': 0, 'failed': 0, 'total': 0}
         
-        logger.info(f'📋 Found {len(pending)} pending downloads')
+        # VODs streamlink couldn't fetch: (download_id, twitch_vod_id, vod_url, output_path)
+        fallbacks = []
+        out_of_space = False
         
-        stats = {'successful': 0, 'failed': 0, 'total': len(pending)}
+        # Stream pending downloads with just the stream fields we use
+        for page in self.db.iter_pending_downloads(columns='id, streams(twitch_vod_id, title)'):
+            stats['total'] += len(page)
+            logger.info(f'📋 Found {len(page)} pending downloads')
+            
+            for index, item in enumerate(page):
+                stream_record = item.pop('streams')
+                download_record = item
+                
+                try:
+                    # Space won't free up mid-run, so fail the rest of this page together
+                    # (later pages stay pending for the next run)
+                    if not self.check_disk_space([record['id'] for record in page[index:]]):
+                        stats['failed'] += len(page) - index
+                        out_of_space = True
+                        break
+                    
+                    vod_url, output_path, success = self.start_download(download_record, stream_record)
+                    
+                    if not success:
+                        # Retry with yt-dlp later, in a single batch
+                        fallbacks.append((download_record['id'], stream_record['twitch_vod_id'], vod_url, output_path))
+                        continue
+                    
+                    if self.finish_download(download_record['id'], stream_record['twitch_vod_id'], output_path, success):
+                        stats['successful'] += 1
+                    else:
+                        stats['failed'] += 1
+                except Exception as e:
+                    logger.error(f'❌ Error processing download {download_record["id"]}: {e}')
+                    self.db.mark_download_failed(download_record['id'], str(e))
+                    stats['failed'] += 1
+            
+            if out_of_space:
+                break
         
-        for item in pending:
-            download_record = {k: v for k, v in item.items() if not k == 'streams'}
-            stream_record = item['streams']
+        if not stats['total']:
+            logger.info('💤 No pending downloads')
+            return stats
+        
+        if fallbacks and out_of_space:
+            # Disk is already known to be full, don't start more multi-GB downloads
+            error_msg = 'Insufficient disk: yt-dlp fallback skipped'
+            logger.error(f'❌ {error_msg} for {len(fallbacks)} VODs')
+            self.db.mark_downloads_failed([download_id for download_id, _, _, _ in fallbacks], error_msg)
+            stats['failed'] += len(fallbacks)
+            fallbacks = []
+        
+        if fallbacks:
+            logger.warning(f'⚠️  Streamlink failed for {len(fallbacks)} VODs, trying yt-dlp...')
+        
+        while fallbacks:
+            # A whole batch lands in temp at once, so only take as many VODs as fit
+            # (finish_download removes each local file, freeing space for the next batch)
+            slots = self.disk_slots()
+            if slots < 1:
+                error_msg = 'Insufficient disk for yt-dlp fallback'
+                logger.error(f'❌ {error_msg} ({len(fallbacks)} VODs)')
+                self.db.mark_downloads_failed([download_id for download_id, _, _, _ in fallbacks], error_msg)
+                stats['failed'] += len(fallbacks)
+                break
             
-            try:
-                success = self.download_vod(download_record, stream_record)
-                if success:
-                    stats['successful'] += 1
-                else:
+            batch, fallbacks = fallbacks[:slots], fallbacks[slots:]
+            results = self.download_batch_with_ytdlp([(url, path) for _, _, url, path in batch])
+            
+            for download_id, twitch_vod_id, vod_url, output_path in batch:
+                try:
+                    if self.finish_download(download_id, twitch_vod_id, output_path, results.get(vod_url, False)):
+                        stats['successful'] += 1
+                    else:
+                        stats['failed'] += 1
+                except Exception as e:
+                    logger.error(f'❌ Error processing download {download_id}: {e}')
+                    self.db.mark_download_failed(download_id, str(e))
                     stats['failed'] += 1
-            except Exception as e:
-                logger.error(f'❌ Error processing download {download_record["id"]}: {e}')
-                self.db.mark_download_failed(download_record['id'], str(e))
-                stats['failed'] += 1
         
         logger.info(f'🎉 Download processing complete!')
         logger.info(f'   Successful: {stats["successful"]}')
@@ -7,27 +7,107 @@ Prioritizes Twitch for accurate game names and basic info
 
 import sys
 import os
-import re
+import time
+import random
+import asyncio
 import logging
-from typing import Optional, Dict, Any, List, Tuple
-from datetime import datetime
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Union, TYPE_CHECKING
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-import requests
+import httpx
+from twitchAPI.helper import first
 
-from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from twitch_handler import TwitchHandler
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.supabase_client import SupabaseClient
+from src.supabase_client import SupabaseClient, get_supabase_client
 from api_clients.igdb_client import IGDBClient
+from api_clients.rate_limiter import TokenBucket
+from api_clients.circuit_breaker import CircuitBreaker, CircuitOpen
+from api_clients.fast_json import loads
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# How long game metadata stays in the in-process cache
+MEMORY_CACHE_TTL_SECONDS = 600
+
+# Most games kept in the in-process cache (least recently used are evicted)
+MEMORY_CACHE_MAX_ENTRIES = 1024
+
+# How long to remember that no source had metadata for a game
+NEGATIVE_CACHE_TTL_SECONDS = 86400
+
+# Most failed names kept in the in-process negative cache
+NEGATIVE_CACHE_MAX_ENTRIES = 2048
+
+# Placeholder used when a stream has no game set; no API knows this "game"
+DEFAULT_GAME_NAME = 'Games + Demos'
+DEFAULT_METADATA = {
+    'game_name': DEFAULT_GAME_NAME,
+    'source': 'default',
+    'description': '',
+    'tags': ['Gaming', 'Demos'],
+    'igdb_id': None,
+    'rawg_id': None
+}
+
+# Supabase cache freshness: fresh rows are served as-is, stale rows are served
+# while a background refresh runs, expired rows are re-fetched before returning
+METADATA_FRESH_SECONDS = 7 * 86400
+METADATA_STALE_SECONDS = 30 * 86400
+
+# RAWG request timeouts (3s to connect, 7s for everything else)
+RAWG_TIMEOUT = httpx.Timeout(7, connect=3)
+
+# Retries for transient RAWG failures, with exponential backoff
+RAWG_MAX_RETRIES = 2
+RAWG_RETRY_BACKOFF_SECONDS = 0.5
+RAWG_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Hard cap on a single IGDB search, so a hung IGDB can't stall a batch
+IGDB_SEARCH_TIMEOUT_SECONDS = 10
+
+# Retries for a failed Supabase metadata write, with exponential backoff
+METADATA_WRITE_RETRIES = 2
+METADATA_WRITE_BACKOFF_SECONDS = 1
+
+# Most IDs or names Twitch accepts in one Get Games request
+TWITCH_GAMES_PER_REQUEST = 100
+
+
+@lru_cache(maxsize=4096)
+def _normalize(name: str) -> str:
+    """
+    Normalize a game name for comparisons (Twitch, IGDB, RAWG and cache keys)
+    
+    Casefolds, treats en/em dashes as hyphens and collapses all whitespace
+    (including non-breaking spaces) to single spaces.
+    """
+    name = name.replace('\u2014', '-').replace('\u2013', '-')
+    return ' '.join(name.casefold().split())
+
+
+@dataclass(frozen=True)
+class GameKey:
+    """A game name together with its normalized form, computed once"""
+    raw: str
+    norm: str
+    
+    @classmethod
+    def of(cls, game: Union[str, 'GameKey']) -> 'GameKey':
+        """Build a key from a name (stripped), or return an existing key as-is"""
+        if isinstance(game, GameKey):
+            return game
+        return cls(game.strip(), _normalize(game))
+
 
 class GameMetadataHandler:
     """Handles fetching and caching game metadata from multiple sources"""
@@ -40,22 +120,81 @@ class GameMetadataHandler:
             db_client: Optional SupabaseClient instance
             twitch_handler: Optional TwitchHandler instance for Twitch API access
         """
-        self.db = db_client or SupabaseClient()
+        self._db_client = db_client
         self.twitch_handler = twitch_handler
         
-        # Initialize API clients
-        self.igdb_client = IGDBClient()
+        # API clients (IGDB client is built lazily, see igdb_client)
+        # RAWG async HTTP client, created on first use (see _get_rawg_client)
+        self._rawg_http: Optional[httpx.AsyncClient] = None
+        
+        # Client-side rate limits (IGDB allows 4 req/s; leave headroom)
+        self._igdb_bucket = TokenBucket(rate=3, capacity=4)
+        self._rawg_bucket = TokenBucket(rate=5, capacity=5)
+        
+        # Stop calling IGDB for 2 minutes after 5 consecutive errors/timeouts
+        self._igdb_breaker = CircuitBreaker(fail_threshold=5, reset_after=120)
         
         # API Keys
         self.rawg_api_key = os.getenv('RAWG_API_KEY')
         self.steam_api_key = os.getenv('STEAM_API_KEY')  # Not available yet
         
+        # Max concurrent metadata lookups when processing a batch of downloads
+        self.max_concurrent_lookups = int(os.getenv('METADATA_MAX_CONCURRENT', '10'))
+        
+        # In-process LRU cache in front of Supabase: normalized name -> (cached_at, metadata)
+        self._mem_cache: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        
+        # Negative cache for games no source knows about: normalized name -> expires_at
+        self._failed_cache: 'OrderedDict[str, float]' = OrderedDict()
+        
+        # In-flight background refreshes of stale metadata: normalized name -> task
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+        # Bounds concurrent refreshes like batch lookups (created on first use)
+        self._refresh_semaphore: Optional[asyncio.Semaphore] = None
+        
+        # Write-behind queue for single metadata writes, drained by a background
+        # task (both created on first use, inside the running event loop)
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        
         logger.info('🎮 Game Metadata Handler initialized')
         if not self.rawg_api_key:
             logger.warning('⚠️  RAWG API key not found')
         if not self.steam_api_key:
             logger.warning('⚠️  Steam API key not found (will skip Steam)')
     
+    def _get_rawg_client(self) -> httpx.AsyncClient:
+        """Shared RAWG client with a keep-alive pool sized for concurrent lookups"""
+        if self._rawg_http is None:
+            self._rawg_http = httpx.AsyncClient(
+                headers={'User-Agent': 'contentautomation/1.0'},
+                timeout=RAWG_TIMEOUT,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30)
+            )
+        return self._rawg_http
+    
+    async def close(self):
+        """Flush queued metadata writes and close the RAWG HTTP client"""
+        await self.flush_writes()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            self._writer_task = None
+            self._write_queue = None
+        
+        if self._rawg_http is not None:
+            await self._rawg_http.aclose()
+            self._rawg_http = None
+    
+    @cached_property
+    def db(self) -> SupabaseClient:
+        """Supabase client, created on first use unless one was passed in"""
+        return self._db_client or get_supabase_client()
+    
+    @cached_property
+    def igdb_client(self) -> IGDBClient:
+        """IGDB client, created on first use (fetches an access token)"""
+        return IGDBClient()
+    
     async def fetch_from_twitch(self, game_id: str = None, game_name: str = None) -> Optional[Dict[str, Any]]:
         """
         Fetch game metadata from Twitch API (PRIMARY SOURCE)
@@ -80,86 +219,140 @@ class GameMetadataHandler:
             
             # Try by game_id first (most reliable)
             if game_id:
-                logger.info(f'🔍 Fetching game from Twitch by ID: {game_id}')
-                from twitchAPI.helper import first
+                logger.info('🔍 Fetching game from Twitch by ID: %s', game_id)
                 game_generator = self.twitch_handler.twitch.get_games(game_ids=[game_id])
                 game = await first(game_generator)
             
             # Fallback to search by name
             elif game_name:
-                logger.info(f'🔍 Searching Twitch for: {game_name}')
-                from twitchAPI.helper import first
+                logger.info('🔍 Searching Twitch for: %s', game_name)
                 game_generator = self.twitch_handler.twitch.get_games(names=[game_name])
                 game = await first(game_generator)
             
             if not game:
-                logger.warning(f'⚠️  Game not found on Twitch')
+                logger.warning('⚠️  Game not found on Twitch')
                 return None
             
-            # Extract metadata from Twitch
-            metadata = {
-                'game_name': game.name,
-                'source': 'twitch',
-                'twitch_game_id': game.id,
-                'description': '',  # Twitch doesn't provide descriptions
-                'tags': [],  # Will get from IGDB/RAWG if needed
-                'box_art_url': game.box_art_url if hasattr(game, 'box_art_url') else None,
-                'igdb_id': game.igdb_id if hasattr(game, 'igdb_id') else None
-            }
+            metadata = self._twitch_game_metadata(game)
             
-            logger.info(f'✅ Found game on Twitch: {metadata["game_name"]}')
+            logger.info('✅ Found game on Twitch: %s', metadata['game_name'])
             if metadata.get('igdb_id'):
-                logger.info(f'   IGDB ID available: {metadata["igdb_id"]}')
+                logger.info('   IGDB ID available: %s', metadata['igdb_id'])
             
             return metadata
             
         except Exception as e:
-            logger.error(f'❌ Twitch API error: {e}')
+            logger.error('❌ Twitch API error: %s', e)
             return None
     
-    def fetch_from_igdb(self, game_name: str, igdb_id: str = None, require_exact_match: bool = True) -> Optional[Dict[str, Any]]:
+    def _twitch_game_metadata(self, game) -> Dict[str, Any]:
+        """Extract metadata from a Twitch Game object"""
+        return {
+            'game_name': game.name,
+            'source': 'twitch',
+            'twitch_game_id': game.id,
+            'description': '',  # Twitch doesn't provide descriptions
+            'tags': [],  # Will get from IGDB/RAWG if needed
+            'box_art_url': game.box_art_url if hasattr(game, 'box_art_url') else None,
+            'igdb_id': game.igdb_id if hasattr(game, 'igdb_id') else None
+        }
+    
+    async def fetch_from_twitch_batch(
+        self,
+        game_ids: List[str] = None,
+        game_names: List[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch many games from Twitch in as few requests as possible
+        
+        Args:
+            game_ids: Twitch game IDs to look up
+            game_names: Game names to look up (for streams without a game ID)
+        
+        Returns:
+            Dictionary of metadata keyed by Twitch game ID and by normalized game name
+        
+        Raises:
+            Exception: If a Twitch request fails (callers fall back to per-game lookups)
+        """
+        games: Dict[str, Dict[str, Any]] = {}
+        if not self.twitch_handler:
+            return games
+        
+        if not self.twitch_handler.twitch:
+            await self.twitch_handler.authenticate()
+        
+        game_ids = list(game_ids or [])
+        game_names = list(game_names or [])
+        
+        batches = [
+            {'game_ids': game_ids[i:i + TWITCH_GAMES_PER_REQUEST]}
+            for i in range(0, len(game_ids), TWITCH_GAMES_PER_REQUEST)
+        ] + [
+            {'names': game_names[i:i + TWITCH_GAMES_PER_REQUEST]}
+            for i in range(0, len(game_names), TWITCH_GAMES_PER_REQUEST)
+        ]
+        
+        for kwargs in batches:
+            async for game in self.twitch_handler.twitch.get_games(**kwargs):
+                metadata = self._twitch_game_metadata(game)
+                games[game.id] = metadata
+                games[_normalize(game.name)] = metadata
+        
+        found = len({metadata['twitch_game_id'] for metadata in games.values()})
+        logger.info('✅ Fetched %s games from Twitch in %s requests', found, len(batches))
+        return games
+    
+    def _search_igdb(self, game_name: str) -> List[Dict[str, Any]]:
+        """Blocking IGDB search; run via asyncio.to_thread"""
+        return self.igdb_client.search_games(game_name, limit=10)
+    
+    async def fetch_from_igdb(self, game_name: Union[str, GameKey], igdb_id: str = None, require_exact_match: bool = True) -> Optional[Dict[str, Any]]:
         """
         Fetch game metadata from IGDB
         
         Args:
-            game_name: Name of the game (from Twitch - this is canonical)
+            game_name: Name (or GameKey) of the game (from Twitch - this is canonical)
             igdb_id: Optional IGDB ID from Twitch for direct lookup
             require_exact_match: If True, only return if exact match found (prevents wrong game data)
         
         Returns:
             Dictionary with game metadata or None
         """
+        key = GameKey.of(game_name)
+        game_name = key.raw
+        
         try:
             if igdb_id:
-                logger.info(f'🔍 Fetching IGDB game by ID: {igdb_id}')
+                logger.info('🔍 Fetching IGDB game by ID: %s', igdb_id)
                 # TODO: Add direct ID lookup to IGDB client if needed
             
-            logger.info(f'🔍 Searching IGDB for: {game_name}')
+            logger.info('🔍 Searching IGDB for: %s', game_name)
+            
+            # Search for game (the IGDB client is blocking, so keep it off the event loop)
+            async def search():
+                await self._igdb_bucket.acquire_async()
+                return await asyncio.wait_for(
+                    asyncio.to_thread(self._search_igdb, game_name),
+                    timeout=IGDB_SEARCH_TIMEOUT_SECONDS
+                )
             
-            # Search for game
-            results = self.igdb_client.search_games(game_name, limit=10)
+            results = await self._igdb_breaker.call_async(search)
             
             if not results:
-                logger.warning(f'⚠️  No results from IGDB for: {game_name}')
+                logger.warning('⚠️  No results from IGDB for: %s', game_name)
                 return None
             
-            # Find EXACT match only
-            game = None
-            search_name = game_name.lower().strip()
-            
-            for result in results:
-                result_name = result.get('name', '').lower().strip()
-                
-                # EXACT match only
-                if result_name == search_name:
-                    game = result
-                    logger.info(f'✅ Found EXACT match in IGDB: {result.get("name")}')
-                    break
+            # Find EXACT match only (first result wins if names repeat)
+            by_name = {_normalize(result.get('name') or ''): result for result in reversed(results)}
+            game = by_name.get(key.norm)
+            if game:
+                logger.info('✅ Found EXACT match in IGDB: %s', game.get('name'))
             
             # If require_exact_match and no exact match found, return None
             if require_exact_match and not game:
-                logger.warning(f'⚠️  No EXACT match in IGDB for: {game_name}')
-                logger.info(f'   Skipping IGDB, will try RAWG instead')
+                logger.warning('⚠️  No EXACT match in IGDB for: %s', game_name)
+                logger.info('   Skipping IGDB, will try RAWG instead')
                 return None
             
             # If we found an exact match, extract metadata
@@ -182,67 +375,81 @@ class GameMetadataHandler:
                 # Limit to top 3 tags
                 metadata['tags'] = metadata['tags'][:3]
                 
-                logger.info(f'✅ Using IGDB data for: {metadata["game_name"]}')
-                logger.info(f'   Tags: {", ".join(metadata["tags"])}')
+                logger.info('✅ Using IGDB data for: %s', metadata['game_name'])
+                logger.info('   Tags: %s', ', '.join(metadata['tags']))
                 
                 return metadata
             
             return None
             
+        except CircuitOpen:
+            logger.info('⏭️  IGDB circuit open, skipping: %s', game_name)
+            return None
+        except asyncio.TimeoutError:
+            logger.error('❌ IGDB timed out after %ss for: %s', IGDB_SEARCH_TIMEOUT_SECONDS, game_name)
+            return None
         except Exception as e:
-            logger.error(f'❌ IGDB error: {e}')
+            logger.error('❌ IGDB error: %s', e)
             return None
     
-    def fetch_from_rawg(self, game_name: str) -> Optional[Dict[str, Any]]:
+    async def fetch_from_rawg(self, game_name: Union[str, GameKey]) -> Optional[Dict[str, Any]]:
         """
         Fetch game metadata from RAWG API
         
         Args:
-            game_name: Name of the game (from Twitch - this is canonical)
+            game_name: Name (or GameKey) of the game (from Twitch - this is canonical)
         
         Returns:
             Dictionary with game metadata or None
         """
+        key = GameKey.of(game_name)
+        game_name = key.raw
+        
         if not self.rawg_api_key:
             logger.warning('⚠️  RAWG API key not available')
             return None
         
         try:
-            logger.info(f'🔍 Searching RAWG for: {game_name}')
+            logger.info('🔍 Searching RAWG for: %s', game_name)
             
             # RAWG API search endpoint
             url = 'https://api.rawg.io/api/games'
             params = {
                 'key': self.rawg_api_key,
                 'search': game_name,
-                'page_size': 10
+                'page_size': 10,
+                'exclude_additions': 'true'  # Skip DLC/editions; we only match base games
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            client = self._get_rawg_client()
+            for attempt in range(RAWG_MAX_RETRIES + 1):
+                await self._rawg_bucket.acquire_async()
+                try:
+                    response = await client.get(url, params=params)
+                except httpx.TransportError:
+                    if attempt == RAWG_MAX_RETRIES:
+                        raise
+                else:
+                    if response.status_code not in RAWG_RETRY_STATUSES or attempt == RAWG_MAX_RETRIES:
+                        break
+                await asyncio.sleep(RAWG_RETRY_BACKOFF_SECONDS * 2 ** attempt)
             response.raise_for_status()
             
-            data = response.json()
+            data = loads(response.content)
             
             if not data.get('results'):
-                logger.warning(f'⚠️  No results from RAWG for: {game_name}')
+                logger.warning('⚠️  No results from RAWG for: %s', game_name)
                 return None
             
-            # Find EXACT match only
-            game = None
-            search_name = game_name.lower().strip()
-            
-            for result in data['results']:
-                result_name = result.get('name', '').lower().strip()
-                
-                # EXACT match
-                if result_name == search_name:
-                    game = result
-                    logger.info(f'✅ Found EXACT match in RAWG: {result.get("name")}')
-                    break
+            # Find EXACT match only (first result wins if names repeat)
+            by_name = {_normalize(result.get('name') or ''): result for result in reversed(data['results'])}
+            game = by_name.get(key.norm)
+            if game:
+                logger.info('✅ Found EXACT match in RAWG: %s', game.get('name'))
             
             # If no exact match, return None (don't guess)
             if not game:
-                logger.warning(f'⚠️  No EXACT match in RAWG for: {game_name}')
+                logger.warning('⚠️  No EXACT match in RAWG for: %s', game_name)
                 return None
             
             # Extract metadata - USE TWITCH NAME
@@ -254,61 +461,252 @@ class GameMetadataHandler:
                 'tags': []
             }
             
-            # Extract genre/tag names
-            if game.get('genres'):
-                for genre in game['genres'][:3]:  # Top 3
-                    metadata['tags'].append(genre['name'])
+            # Extract genre/tag names (top 3, genres first)
+            metadata['tags'] = [genre['name'] for genre in (game.get('genres') or [])[:3]]
             
-            if game.get('tags') and len(metadata['tags']) < 3:
-                for tag in game['tags'][:3 - len(metadata['tags'])]:
-                    metadata['tags'].append(tag['name'])
+            need = 3 - len(metadata['tags'])
+            if need > 0 and game.get('tags'):
+                metadata['tags'].extend(tag['name'] for tag in game['tags'][:need])
             
-            logger.info(f'✅ Using RAWG data for: {metadata["game_name"]}')
-            logger.info(f'   Tags: {", ".join(metadata["tags"])}')
+            logger.info('✅ Using RAWG data for: %s', metadata['game_name'])
+            logger.info('   Tags: %s', ', '.join(metadata['tags']))
             
             return metadata
             
         except Exception as e:
-            logger.error(f'❌ RAWG error: {e}')
+            logger.error('❌ RAWG error: %s', e)
             return None
     
-    async def fetch_game_metadata(
-        self, 
-        game_name: str, 
-        game_id: str = None
-    ) -> Tuple[Optional[Dict[str, Any]], str]:
+    async def fetch_from_fallback_sources(
+        self,
+        game_name: Union[str, GameKey],
+        igdb_task: Optional['asyncio.Task'] = None
+    ) -> Optional[Dict[str, Any]]:
         """
-        Fetch game metadata from all available sources (Twitch → IGDB → RAWG)
+        Query IGDB and RAWG concurrently and return the first usable result
+        
+        IGDB is preferred: a RAWG hit is only used once IGDB has come back empty.
         
         Args:
-            game_name: Name of the game
-            game_id: Optional Twitch game ID
+            game_name: Name (or GameKey) of the game
+            igdb_task: Optional IGDB lookup for game_name that is already running
         
         Returns:
-            Tuple of (metadata dict or None, status string)
-            Status: 'success', 'failed', 'cached'
+            Dictionary with game metadata or None
         """
-        # Normalize game name
-        game_name = game_name.strip()
+        key = GameKey.of(game_name)
         
-        # Check cache first
-        cached = self.db.get_game_metadata(game_name)
-        if cached:
-            logger.info(f'💾 Using cached metadata for: {game_name}')
-            return cached, 'cached'
+        # Listed in order of preference; don't even start IGDB while it's tripped
+        tasks = []
+        if igdb_task:
+            tasks.append(igdb_task)
+        elif not self._igdb_breaker.is_open:
+            tasks.append(asyncio.create_task(self.fetch_from_igdb(key)))
+        tasks.append(asyncio.create_task(self.fetch_from_rawg(key)))
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in tasks:
+                    if not task.done():
+                        break  # A preferred source is still running
+                    if task.result():
+                        return task.result()
+            
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _cache_key(self, game_name: str) -> str:
+        """Normalize a game name for in-process cache lookups"""
+        return _normalize(game_name)
+    
+    def _remember(self, game_name: str, metadata: Dict[str, Any]):
+        """Store metadata in the in-process cache"""
+        key = self._cache_key(game_name)
+        self._mem_cache[key] = (time.time(), metadata)
+        self._mem_cache.move_to_end(key)
+        while len(self._mem_cache) > MEMORY_CACHE_MAX_ENTRIES:
+            self._mem_cache.popitem(last=False)
+    
+    def _remember_failure(self, game_name: str, expires_at: float):
+        """Store a failed lookup in the in-process negative cache"""
+        key = self._cache_key(game_name)
+        self._failed_cache[key] = expires_at
+        self._failed_cache.move_to_end(key)
+        
+        if len(self._failed_cache) > NEGATIVE_CACHE_MAX_ENTRIES:
+            # Drop expired entries first, then the oldest ones
+            now = time.time()
+            for expired in [k for k, until in self._failed_cache.items() if until <= now]:
+                del self._failed_cache[expired]
+            while len(self._failed_cache) > NEGATIVE_CACHE_MAX_ENTRIES:
+                self._failed_cache.popitem(last=False)
+    
+    def _store(
+        self,
+        game_name: str,
+        metadata: Dict[str, Any],
+        pending_writes: Optional[List[Dict[str, Any]]] = None,
+        spread: bool = False
+    ):
+        """
+        Cache freshly fetched metadata in memory and in Supabase
+        
+        Args:
+            game_name: Name the metadata was looked up under
+            metadata: Metadata to cache
+            pending_writes: If given, the Supabase write is queued here for a
+                            later upsert_game_metadata_batch instead of sent now
+            spread: If True, end the fresh window at a random point, so rows
+                    stamped together don't all go stale together
+        """
+        now = datetime.now(timezone.utc)
+        fresh_seconds = METADATA_FRESH_SECONDS * (random.random() if spread else 1)
+        metadata['fresh_until'] = (now + timedelta(seconds=fresh_seconds)).isoformat()
+        metadata['stale_until'] = (now + timedelta(seconds=METADATA_STALE_SECONDS)).isoformat()
+        
+        self._remember(game_name, metadata)
         
-        logger.info(f'🎮 Fetching metadata for: {game_name}')
+        if pending_writes is not None:
+            pending_writes.append(metadata)
+            return
+        
+        # Write in the background; callers only need the returned metadata
+        if self._write_queue is None:
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._drain_writes())
+        self._write_queue.put_nowait((game_name, metadata))
+    
+    async def _drain_writes(self):
+        """Background task: write queued metadata to Supabase"""
+        while True:
+            # Take everything that queued up while the last write was in flight
+            entries = [await self._write_queue.get()]
+            while not self._write_queue.empty():
+                entries.append(self._write_queue.get_nowait())
+            
+            try:
+                await self._cache(entries)
+            finally:
+                for _ in entries:
+                    self._write_queue.task_done()
+    
+    async def _cache(self, entries: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Write metadata to Supabase in one upsert, retrying transient failures
+        
+        Args:
+            entries: (game_name, metadata) pairs to write
+        """
+        rows = [metadata for _, metadata in entries]
+        for attempt in range(METADATA_WRITE_RETRIES + 1):
+            try:
+                await asyncio.to_thread(self.db.upsert_game_metadata_batch, rows)
+                logger.info('💾 Cached metadata for: %s', ', '.join(name for name, _ in entries))
+                return
+            except Exception as e:
+                if attempt == METADATA_WRITE_RETRIES:
+                    logger.error('⚠️  Failed to cache metadata: %s', e)
+                    return
+                await asyncio.sleep(METADATA_WRITE_BACKOFF_SECONDS * 2 ** attempt)
+    
+    async def flush_writes(self):
+        """Wait until all queued metadata writes have reached Supabase"""
+        if self._write_queue is not None:
+            await self._write_queue.join()
+    
+    def _freshness(self, metadata: Dict[str, Any]) -> str:
+        """
+        Classify a Supabase cache row by its fresh_until/stale_until timestamps
+        
+        Returns:
+            'fresh', 'stale' or 'expired'
+        """
+        if not metadata.get('fresh_until') or not metadata.get('stale_until'):
+            return 'stale'  # Cached before freshness tracking (stamped on first read)
+        
+        now = time.time()
+        if now < datetime.fromisoformat(metadata['fresh_until']).timestamp():
+            return 'fresh'
+        if now < datetime.fromisoformat(metadata['stale_until']).timestamp():
+            return 'stale'
+        return 'expired'
+    
+    def _schedule_refresh(self, game_name: str, game_id: str = None):
+        """Refresh stale metadata in the background, at most once per game"""
+        key = self._cache_key(game_name)
+        if key in self._refresh_tasks:
+            return
+        
+        if self._refresh_semaphore is None:
+            self._refresh_semaphore = asyncio.Semaphore(self.max_concurrent_lookups)
+        task = asyncio.create_task(self._refresh_in_background(game_name, game_id))
+        self._refresh_tasks[key] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(key, None))
+    
+    async def _refresh_in_background(self, game_name: str, game_id: str = None):
+        """Re-fetch metadata for a stale cache row; keeps the old row on failure"""
+        try:
+            async with self._refresh_semaphore:
+                metadata = await self._fetch_from_sources(game_name, game_id)
+            if metadata:
+                self._store(game_name, metadata)
+                logger.info('🔄 Refreshed stale metadata for: %s', game_name)
+        except Exception as e:
+            logger.error('⚠️  Background refresh failed for %s: %s', game_name, e)
+    
+    async def wait_for_refreshes(self):
+        """Wait for any background metadata refreshes to finish"""
+        if self._refresh_tasks:
+            await asyncio.gather(*self._refresh_tasks.values(), return_exceptions=True)
+    
+    async def _fetch_from_sources(
+        self,
+        game_name: Union[str, GameKey],
+        game_id: str = None,
+        twitch_games: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetch game metadata from the APIs, without consulting or updating any cache
+        
+        Args:
+            game_name: Name (or GameKey) of the game
+            game_id: Optional Twitch game ID
+            twitch_games: Optional fetch_from_twitch_batch result to use instead
+                          of a per-game Twitch request
+        
+        Returns:
+            Dictionary with game metadata or None
+        """
+        key = GameKey.of(game_name)
+        game_name = key.raw
+        igdb_task = None
         
         # Try Twitch first (MOST RELIABLE)
         if self.twitch_handler:
-            twitch_metadata = await self.fetch_from_twitch(game_id=game_id, game_name=game_name)
+            if twitch_games is not None:
+                # Preloaded: nothing to wait on, so there's no lookup to overlap
+                twitch_metadata = twitch_games.get(game_id) or twitch_games.get(key.norm)
+            else:
+                # Start the IGDB lookup while Twitch resolves the game. The stream's
+                # game name came from Twitch, so it nearly always matches the canonical name
+                igdb_task = asyncio.create_task(self.fetch_from_igdb(key))
+                twitch_metadata = await self.fetch_from_twitch(game_id=game_id, game_name=game_name)
             if twitch_metadata:
-                # Get additional details from IGDB if we have IGDB ID
-                igdb_id = twitch_metadata.get('igdb_id')
-                igdb_metadata = self.fetch_from_igdb(
-                    twitch_metadata['game_name'], 
-                    igdb_id=igdb_id
-                )
+                # Get additional details from IGDB
+                if igdb_task and _normalize(twitch_metadata['game_name']) == key.norm:
+                    igdb_metadata = await igdb_task
+                else:
+                    if igdb_task:
+                        igdb_task.cancel()
+                    igdb_metadata = await self.fetch_from_igdb(
+                        twitch_metadata['game_name'],
+                        igdb_id=twitch_metadata.get('igdb_id')
+                    )
                 
                 # Merge Twitch + IGDB data
                 if igdb_metadata:
@@ -322,45 +720,129 @@ class GameMetadataHandler:
                         'igdb_id': igdb_metadata.get('igdb_id')
                     }
                     
-                    logger.info(f'✅ Combined Twitch + IGDB metadata')
+                    logger.info('✅ Combined Twitch + IGDB metadata')
                 else:
                     # Just use Twitch data
                     final_metadata = twitch_metadata
-                    logger.info(f'✅ Using Twitch metadata only')
-                
-                # Cache and return
-                try:
-                    self.db.create_game_metadata(final_metadata)
-                    logger.info(f'💾 Cached metadata for: {game_name}')
-                except Exception as e:
-                    logger.error(f'⚠️  Failed to cache metadata: {e}')
+                    logger.info('✅ Using Twitch metadata only')
                 
-                return final_metadata, 'success'
+                return final_metadata
         
-        # Fallback to IGDB if Twitch unavailable
-        metadata = self.fetch_from_igdb(game_name)
+        # Fallback to IGDB + RAWG if Twitch unavailable (queried concurrently)
+        metadata = await self.fetch_from_fallback_sources(key, igdb_task=igdb_task)
         if metadata:
-            logger.info(f'✅ Found metadata from IGDB')
-            try:
-                self.db.create_game_metadata(metadata)
-                logger.info(f'💾 Cached metadata for: {game_name}')
-            except Exception as e:
-                logger.error(f'⚠️  Failed to cache metadata: {e}')
-            return metadata, 'success'
+            logger.info('✅ Found metadata from %s', metadata['source'].upper())
+        return metadata
+    
+    async def fetch_game_metadata(
+        self, 
+        game_name: str, 
+        game_id: str = None,
+        pending_writes: Optional[List[Dict[str, Any]]] = None,
+        preloaded_cache: Optional[Dict[str, Dict[str, Any]]] = None,
+        twitch_games: Optional[Dict[str, Dict[str, Any]]] = None,
+        preloaded_failures: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Fetch game metadata from all available sources (Twitch → IGDB → RAWG)
+        
+        Args:
+            game_name: Name of the game
+            game_id: Optional Twitch game ID
+            pending_writes: Optional list to collect new metadata rows in, so the
+                            caller can write them with one batch upsert
+            preloaded_cache: Optional game_name -> metadata dict already read from
+                             Supabase; when given it replaces the per-game query
+            twitch_games: Optional fetch_from_twitch_batch result; when given it
+                          replaces the per-game Twitch request
+            preloaded_failures: Optional game_name -> unexpired failed_game_lookups
+                                record; when given it replaces the per-game query
+        
+        Returns:
+            Tuple of (metadata dict or None, status string)
+            Status: 'success', 'failed', 'cached'
+        """
+        # Normalize game name once
+        key = GameKey.of(game_name)
+        game_name = key.raw
+        
+        # The default placeholder never matches anything, so don't ask the APIs
+        if key.norm == _normalize(DEFAULT_GAME_NAME):
+            return {**DEFAULT_METADATA, 'tags': list(DEFAULT_METADATA['tags'])}, 'cached'
+        
+        # Check in-process cache first (no network round-trip)
+        entry = self._mem_cache.get(key.norm)
+        if entry and time.time() - entry[0] < MEMORY_CACHE_TTL_SECONDS:
+            self._mem_cache.move_to_end(key.norm)
+            logger.info('💾 Using cached metadata for: %s', game_name)
+            return entry[1], 'cached'
+        
+        # Skip games that already failed during this run
+        if self._failed_cache.get(key.norm, 0) > time.time():
+            logger.info('⏭️  Skipping recently failed lookup: %s', game_name)
+            return None, 'failed'
+        
+        # Then the Supabase cache
+        if preloaded_cache is not None:
+            cached = preloaded_cache.get(game_name)
+        else:
+            cached = self.db.get_game_metadata(game_name)
+        if cached and not (cached.get('fresh_until') and cached.get('stale_until')):
+            # Cached before freshness tracking: stamp it rather than refresh every
+            # such row at once, spreading when these rows go stale
+            logger.info('💾 Using cached metadata for: %s', game_name)
+            self._store(game_name, cached, pending_writes, spread=True)
+            return cached, 'cached'
+        if cached:
+            freshness = self._freshness(cached)
+            if freshness != 'expired':
+                if freshness == 'stale':
+                    self._schedule_refresh(game_name, game_id)
+                logger.info('💾 Using cached metadata for: %s', game_name)
+                self._remember(game_name, cached)
+                return cached, 'cached'
+            logger.info('⌛ Cached metadata expired for: %s', game_name)
+        
+        # Skip games that failed on a previous run (an expired row still beats
+        # nothing, so those are always retried)
+        failed = None
+        if not cached:
+            if preloaded_failures is not None:
+                failed = preloaded_failures.get(game_name)
+            else:
+                try:
+                    failed = self.db.get_failed_lookup(game_name)
+                except Exception:
+                    failed = None
+        if failed:
+            logger.info('⏭️  Skipping recently failed lookup: %s', game_name)
+            self._remember_failure(game_name, datetime.fromisoformat(failed['expires_at']).timestamp())
+            return None, 'failed'
         
-        # Final fallback to RAWG
-        metadata = self.fetch_from_rawg(game_name)
+        logger.info('🎮 Fetching metadata for: %s', game_name)
+        
+        metadata = await self._fetch_from_sources(key, game_id, twitch_games=twitch_games)
         if metadata:
-            logger.info(f'✅ Found metadata from RAWG')
-            try:
-                self.db.create_game_metadata(metadata)
-                logger.info(f'💾 Cached metadata for: {game_name}')
-            except Exception as e:
-                logger.error(f'⚠️  Failed to cache metadata: {e}')
+            self._store(game_name, metadata, pending_writes)
             return metadata, 'success'
         
+        # An expired row still beats nothing
+        if cached:
+            logger.warning('⚠️  Refresh failed, using expired metadata for: %s', game_name)
+            self._remember(game_name, cached)
+            return cached, 'cached'
+        
         # If all sources failed
-        logger.error(f'❌ All sources failed for: {game_name}')
+        logger.error('❌ All sources failed for: %s', game_name)
+        
+        # Remember the miss so we don't hit every API again for this name
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=NEGATIVE_CACHE_TTL_SECONDS)
+        self._remember_failure(game_name, expires_at.timestamp())
+        try:
+            self.db.create_failed_lookup(game_name, expires_at)
+        except Exception as e:
+            logger.error('⚠️  Failed to cache failed lookup: %s', e)
+        
         return None, 'failed'
     
     async def process_completed_downloads(self) -> Dict[str, int]:
@@ -373,77 +855,154 @@ class GameMetadataHandler:
         logger.info('🚀 Processing completed downloads for metadata...')
         
         try:
-            # Get all completed downloads with their stream data
-            result = self.db.client.table('vod_downloads')\
-                .select('*, streams(*)')\
-                .eq('download_status', 'completed')\
-                .execute()
+            stats = {'processed': 0, 'success': 0, 'failed': 0, 'cached': 0}
+            found_any = False
             
-            completed_downloads = result.data
+            # Work through completed downloads a page at a time to bound memory
+            # Only the stream's game and title are needed here
+            pages = self.db.iter_completed_downloads(columns='id, streams(title, game_name, game_id)')
+            for page in pages:
+                found_any = True
+                await self._process_download_page(page, stats)
             
-            if not completed_downloads:
+            if not found_any:
                 logger.info('💤 No completed downloads to process')
-                return {'processed': 0, 'success': 0, 'failed': 0, 'cached': 0}
-            
-            stats = {'processed': 0, 'success': 0, 'failed': 0, 'cached': 0}
+                return stats
             
-            for item in completed_downloads:
-                download_record = {k: v for k, v in item.items() if k != 'streams'}
-                stream_record = item['streams']
-                
-                # Check if already has upload record
-                existing_upload = self.db.client.table('youtube_uploads')\
-                    .select('id')\
-                    .eq('vod_download_id', download_record['id'])\
-                    .execute()
-                
-                if existing_upload.data:
-                    logger.info(f'⏭️  Download {download_record["id"]} already has upload record')
-                    continue
-                
-                stats['processed'] += 1
-                
-                # Get game info from stream metadata
-                game_name = stream_record.get('game_name')
-                game_id = stream_record.get('game_id')
-                
-                if not game_name or game_name.strip() == '':
-                    logger.warning(f'⚠️  No game_name in stream metadata for: {stream_record["title"]}')
-                    logger.info('   Using default: Games + Demos')
-                    game_name = 'Games + Demos'
-                
-                logger.info(f'🎮 Processing: {stream_record["title"]}')
-                logger.info(f'   Game: {game_name}')
-                if game_id:
-                    logger.info(f'   Game ID: {game_id}')
-                
-                # Fetch metadata
-                metadata, status = await self.fetch_game_metadata(game_name, game_id=game_id)
-                
-                if status == 'cached':
-                    stats['cached'] += 1
-                elif status == 'success':
-                    stats['success'] += 1
-                elif status == 'failed':
-                    stats['failed'] += 1
-            
-            logger.info(f'🎉 Metadata processing complete!')
-            logger.info(f'   Processed: {stats["processed"]}')
-            logger.info(f'   Success: {stats["success"]}')
-            logger.info(f'   Cached: {stats["cached"]}')
-            logger.info(f'   Failed: {stats["failed"]}')
+            logger.info('🎉 Metadata processing complete!')
+            logger.info('   Processed: %s', stats['processed'])
+            logger.info('   Success: %s', stats['success'])
+            logger.info('   Cached: %s', stats['cached'])
+            logger.info('   Failed: %s', stats['failed'])
             
             return stats
             
         except Exception as e:
-            logger.error(f'❌ Error processing downloads: {e}')
+            logger.error('❌ Error processing downloads: %s', e)
             raise
+    
+    async def _process_download_page(self, completed_downloads: List[Dict[str, Any]], stats: Dict[str, int]):
+        """
+        Fetch game metadata for one page of completed downloads
+        
+        Args:
+            completed_downloads: vod_downloads records with embedded stream data,
+                                 none of which have an upload record yet
+            stats: Stats dictionary, updated in place
+        """
+        lookups = []
+        
+        # Downloads that already have upload records were filtered out by the query
+        for item in completed_downloads:
+            stream_record = item.pop('streams')
+            
+            stats['processed'] += 1
+            
+            # Get game info from stream metadata
+            game_name = stream_record.get('game_name')
+            game_id = stream_record.get('game_id')
+            
+            if not game_name or game_name.strip() == '':
+                logger.warning('⚠️  No game_name in stream metadata for: %s', stream_record['title'])
+                logger.info('   Using default: %s', DEFAULT_GAME_NAME)
+                game_name = DEFAULT_GAME_NAME
+            
+            logger.info('🎮 Processing: %s', stream_record['title'])
+            logger.info('   Game: %s', game_name)
+            if game_id:
+                logger.info('   Game ID: %s', game_id)
+            
+            lookups.append((game_name.strip(), game_id))
+        
+        # Look each game up once; downloads that share a game reuse its result
+        unique_lookups: Dict[str, Tuple[str, Optional[str]]] = {}
+        for name, gid in lookups:
+            unique_lookups.setdefault(_normalize(name), (name, gid))
+        
+        # Load every already-cached game in one query instead of one per download
+        names = [name for name, _ in unique_lookups.values()]
+        preloaded_cache = {row['game_name']: row for row in self.db.get_game_metadata_batch(names)}
+        
+        # Likewise for games that failed on a previous run (only uncached ones consult it)
+        try:
+            failed_rows = self.db.get_failed_lookups_batch([name for name in names if name not in preloaded_cache])
+        except Exception:
+            failed_rows = []
+        preloaded_failures = {row['game_name']: row for row in failed_rows}
+        
+        # Resolve the uncached (or expired) games on Twitch in bulk instead of one
+        # request per game
+        twitch_games = None
+        to_fetch = [
+            (name, gid) for name, gid in unique_lookups.values()
+            if (name not in preloaded_cache or self._freshness(preloaded_cache[name]) == 'expired')
+            and name not in preloaded_failures
+            and _normalize(name) != _normalize(DEFAULT_GAME_NAME)
+        ]
+        if self.twitch_handler and to_fetch:
+            try:
+                twitch_games = await self.fetch_from_twitch_batch(
+                    game_ids=[gid for _, gid in to_fetch if gid],
+                    game_names=[name for name, gid in to_fetch if not gid]
+                )
+            except Exception as e:
+                logger.error('⚠️  Twitch batch lookup failed, using per-game lookups: %s', e)
+        
+        # Fetch metadata concurrently, bounded by the semaphore
+        semaphore = asyncio.Semaphore(self.max_concurrent_lookups)
+        pending_writes: List[Dict[str, Any]] = []
+        
+        async def fetch_one(game_name: str, game_id: Optional[str]) -> Tuple[Optional[Dict[str, Any]], str]:
+            async with semaphore:
+                return await self.fetch_game_metadata(
+                    game_name,
+                    game_id=game_id,
+                    pending_writes=pending_writes,
+                    preloaded_cache=preloaded_cache,
+                    twitch_games=twitch_games,
+                    preloaded_failures=preloaded_failures
+                )
+        
+        # One bad lookup shouldn't abort (and lose the results of) the whole page
+        results = await asyncio.gather(
+            *(fetch_one(name, gid) for name, gid in unique_lookups.values()),
+            return_exceptions=True
+        )
+        results_by_game = dict(zip(unique_lookups, results))
+        
+        # Write all newly fetched metadata in a single round-trip
+        try:
+            await asyncio.to_thread(self.db.upsert_game_metadata_batch, pending_writes)
+        except Exception as e:
+            logger.error('⚠️  Failed to cache metadata: %s', e)
+        
+        seen = set()
+        for game_name, _ in lookups:
+            norm = _normalize(game_name)
+            result = results_by_game[norm]
+            repeat = norm in seen
+            seen.add(norm)
+            
+            if isinstance(result, Exception):
+                if not repeat:
+                    logger.error('❌ Error fetching metadata for %s: %s', game_name, result)
+                stats['failed'] += 1
+                continue
+            
+            metadata, status = result
+            if repeat and metadata:
+                status = 'cached'  # Served from the first download's lookup
+            if status == 'cached':
+                stats['cached'] += 1
+            elif status == 'success':
+                stats['success'] += 1
+            elif status == 'failed':
+                stats['failed'] += 1
 
 
 # Example usage and testing
 async def main():
     """Test the game metadata handler"""
-    import asyncio
     from twitch_handler import TwitchHandler
     
     print('\n' + '='*60)
@@ -481,6 +1040,7 @@ async def main():
             print(f'❌ Status: {status}')
             print(f'   No metadata found')
     
+    await handler.close()
     await twitch_handler.close()
     
     print('\n' + '='*60)
@@ -489,5 +1049,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    import asyncio
     asyncio.run(main())
\ No newline at end of file
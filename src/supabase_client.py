@@ -5,10 +5,14 @@ Handles all database operations for the Twitch to YouTube automation
 """
 
 import os
+import time
 import logging
-from datetime import datetime
-from typing import Optional, List, Dict, Any
-from supabase import create_client, Client
+from types import SimpleNamespace
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Set
+import httpx
+from supabase import create_client, Client, ClientOptions
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,19 +20,69 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Connection settings, read once when the module is imported
+_CONFIG = SimpleNamespace(
+    url=os.getenv('SUPABASE_URL'),
+    key=os.getenv('SUPABASE_KEY')
+)
+
+# Keep-alive HTTP/2 pool shared by every PostgREST call from this process
+HTTP_LIMITS = httpx.Limits(max_connections=30, max_keepalive_connections=20, keepalive_expiry=30.0)
+HTTP_TIMEOUT = httpx.Timeout(10.0, connect=5.0, pool=5.0)
+
+# Stream rows are looked up by twitch_stream_id, which never changes once written
+STREAM_CACHE_TTL_SECONDS = 30
+STREAM_CACHE_MAX_ENTRIES = 512
+
+# (epoch second, ISO string) reused by _now_iso within the same second
+_now_cached = (0, '')
+
+
+_http_client: Optional[httpx.Client] = None
+
+
+def _get_http_client() -> httpx.Client:
+    """Keep-alive HTTP/2 client shared by every SupabaseClient in the process"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            transport=httpx.HTTPTransport(http2=True, retries=1, limits=HTTP_LIMITS),
+            timeout=HTTP_TIMEOUT,
+            follow_redirects=True
+        )
+    return _http_client
+
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO-8601 string, formatted at most once per second"""
+    global _now_cached
+    second = int(time.time())
+    if _now_cached[0] != second:
+        _now_cached = (second, datetime.now(timezone.utc).isoformat(timespec='seconds'))
+    return _now_cached[1]
+
 
 class SupabaseClient:
     """Client for interacting with Supabase database"""
     
-    def __init__(self):
-        """Initialize Supabase client"""
-        self.url = os.getenv('SUPABASE_URL')
-        self.key = os.getenv('SUPABASE_KEY')
+    def __init__(self, http_client: Optional[httpx.Client] = None):
+        """
+        Initialize Supabase client
+        
+        Args:
+            http_client: Optional pooled httpx.Client for PostgREST calls. If None, uses the shared one.
+        """
+        self.url = _CONFIG.url
+        self.key = _CONFIG.key
         
         if not self.url or not self.key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
         
-        self.client: Client = create_client(self.url, self.key)
+        http_client = http_client or _get_http_client()
+        self.client: Client = create_client(self.url, self.key, options=ClientOptions(httpx_client=http_client))
+        
+        # twitch_stream_id -> (expires_at, stream row), LRU ordered
+        self._stream_cache: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
         logger.info('✅ Supabase client initialized')
     
     # ==========================================
@@ -49,22 +103,92 @@ class SupabaseClient:
         """
         try:
             result = self.client.table('streams').insert(stream_data).execute()
-            logger.info(f'✅ Stream created: {stream_data.get("twitch_stream_id")}')
-            return result.data[0] if result.data else None
+            logger.info('✅ Stream created: %s', stream_data.get('twitch_stream_id'))
+            stream = result.data[0] if result.data else None
+            # insert() returns the full row, so a follow-up lookup needs no round trip
+            self._cache_stream(stream)
+            return stream
+        except Exception as e:
+            logger.error('❌ Error creating stream: %s', e)
+            raise
+    
+    def bulk_create_streams(self, streams: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Create many stream records in one insert
+        
+        Args:
+            streams: Stream dictionaries, same shape as create_stream
+        
+        Returns:
+            List of created stream records
+        """
+        if not streams:
+            return []
+        try:
+            result = self.client.table('streams').insert(streams).execute()
+            logger.info('✅ %s streams created', len(result.data))
+            for stream in result.data:
+                self._cache_stream(stream)
+            return result.data
+        except Exception as e:
+            logger.error('❌ Error creating streams: %s', e)
+            raise
+    
+    def delete_streams(self, stream_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Delete stream records in one request (used to roll back a failed batch)
+        
+        Args:
+            stream_ids: Stream record IDs to delete
+        
+        Returns:
+            List of deleted stream records
+        """
+        if not stream_ids:
+            return []
+        try:
+            result = self.client.table('streams')\
+                .delete()\
+                .in_('id', stream_ids)\
+                .execute()
+            for stream in result.data:
+                self._stream_cache.pop(stream.get('twitch_stream_id'), None)
+            logger.info('🗑️  %s streams deleted', len(result.data))
+            return result.data
         except Exception as e:
-            logger.error(f'❌ Error creating stream: {e}')
+            logger.error('❌ Error deleting streams: %s', e)
             raise
     
+    def _cache_stream(self, stream: Optional[Dict[str, Any]]):
+        """Remember a stream row under its Twitch ID, evicting the oldest entry when full"""
+        if not stream or not stream.get('twitch_stream_id'):
+            return
+        key = stream['twitch_stream_id']
+        self._stream_cache[key] = (time.monotonic() + STREAM_CACHE_TTL_SECONDS, stream)
+        self._stream_cache.move_to_end(key)
+        if len(self._stream_cache) > STREAM_CACHE_MAX_ENTRIES:
+            self._stream_cache.popitem(last=False)
+    
     def get_stream_by_twitch_id(self, twitch_stream_id: str) -> Optional[Dict[str, Any]]:
-        """Get stream by Twitch stream ID"""
+        """Get stream by Twitch stream ID (recent hits are served from memory)"""
+        cached = self._stream_cache.get(twitch_stream_id)
+        if cached and cached[0] > time.monotonic():
+            self._stream_cache.move_to_end(twitch_stream_id)
+            return cached[1]
+        
         try:
             result = self.client.table('streams')\
                 .select('*')\
                 .eq('twitch_stream_id', twitch_stream_id)\
+                .limit(1)\
+                .maybe_single()\
                 .execute()
-            return result.data[0] if result.data else None
+            stream = result.data if result else None
+            # Misses aren't cached, a stream may be created right after the check
+            self._cache_stream(stream)
+            return stream
         except Exception as e:
-            logger.error(f'❌ Error getting stream: {e}')
+            logger.error('❌ Error getting stream: %s', e)
             raise
     
     def update_stream(self, stream_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
@@ -83,23 +207,47 @@ class SupabaseClient:
                 .update(updates)\
                 .eq('id', stream_id)\
                 .execute()
-            logger.info(f'✅ Stream updated: {stream_id}')
-            return result.data[0] if result.data else None
+            logger.info('✅ Stream updated: %s', stream_id)
+            stream = result.data[0] if result.data else None
+            self._cache_stream(stream)
+            return stream
+        except Exception as e:
+            logger.error('❌ Error updating stream: %s', e)
+            raise
+    
+    def get_existing_stream_ids(self, twitch_vod_ids: List[str]) -> Set[str]:
+        """
+        Find which Twitch VOD IDs already have a stream record
+        
+        Args:
+            twitch_vod_ids: Twitch VOD IDs to check
+        
+        Returns:
+            Set of the given VOD IDs that are already in the streams table
+        """
+        if not twitch_vod_ids:
+            return set()
+        try:
+            result = self.client.table('streams')\
+                .select('twitch_vod_id')\
+                .in_('twitch_vod_id', twitch_vod_ids)\
+                .execute()
+            return {row['twitch_vod_id'] for row in result.data}
         except Exception as e:
-            logger.error(f'❌ Error updating stream: {e}')
+            logger.error('❌ Error checking existing streams: %s', e)
             raise
     
-    def get_streams_by_status(self, status: str) -> List[Dict[str, Any]]:
-        """Get all streams with a specific status"""
+    def get_streams_by_status(self, status: str, columns: str = '*') -> List[Dict[str, Any]]:
+        """Get all streams with a specific status (columns narrows the select list)"""
         try:
             result = self.client.table('streams')\
-                .select('*')\
+                .select(columns)\
                 .eq('stream_status', status)\
                 .order('started_at', desc=True)\
                 .execute()
             return result.data
         except Exception as e:
-            logger.error(f'❌ Error getting streams by status: {e}')
+            logger.error('❌ Error getting streams by status: %s', e)
             raise
     
     def mark_stream_ended(self, stream_id: str, ended_at: datetime, 
@@ -125,10 +273,31 @@ class SupabaseClient:
                 'download_status': 'pending'
             }
             result = self.client.table('vod_downloads').insert(download_data).execute()
-            logger.info(f'✅ VOD download created for stream: {stream_id}')
+            logger.info('✅ VOD download created for stream: %s', stream_id)
             return result.data[0] if result.data else None
         except Exception as e:
-            logger.error(f'❌ Error creating VOD download: {e}')
+            logger.error('❌ Error creating VOD download: %s', e)
+            raise
+    
+    def bulk_create_vod_downloads(self, stream_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Create a pending VOD download record for each stream in one insert
+        
+        Args:
+            stream_ids: Stream record IDs to queue downloads for
+        
+        Returns:
+            List of created download records
+        """
+        if not stream_ids:
+            return []
+        try:
+            rows = [{'stream_id': stream_id, 'download_status': 'pending'} for stream_id in stream_ids]
+            result = self.client.table('vod_downloads').insert(rows).execute()
+            logger.info('✅ %s VOD downloads created', len(result.data))
+            return result.data
+        except Exception as e:
+            logger.error('❌ Error creating VOD downloads: %s', e)
             raise
     
     def update_vod_download(self, download_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
@@ -138,41 +307,132 @@ class SupabaseClient:
                 .update(updates)\
                 .eq('id', download_id)\
                 .execute()
-            logger.info(f'✅ VOD download updated: {download_id}')
+            logger.info('✅ VOD download updated: %s', download_id)
             return result.data[0] if result.data else None
         except Exception as e:
-            logger.error(f'❌ Error updating VOD download: {e}')
+            logger.error('❌ Error updating VOD download: %s', e)
+            raise
+    
+    def bulk_update_vod_downloads(self, download_ids: List[str], updates: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Apply the same update to many VOD download records in one request
+
+        Args:
+            download_ids: Download record IDs to update
+            updates: Column values to set on every record
+
+        Returns:
+            List of updated records
+        """
+        if not download_ids:
+            return []
+        try:
+            result = self.client.table('vod_downloads')\
+                .update(updates)\
+                .in_('id', download_ids)\
+                .execute()
+            logger.info('✅ %s VOD downloads updated', len(result.data))
+            return result.data
+        except Exception as e:
+            logger.error('❌ Error bulk updating VOD downloads: %s', e)
             raise
     
-    def get_vod_download_by_stream(self, stream_id: str) -> Optional[Dict[str, Any]]:
-        """Get VOD download record for a stream"""
+    def get_vod_download_by_stream(self, stream_id: str, columns: str = '*') -> Optional[Dict[str, Any]]:
+        """Get VOD download record for a stream (columns narrows the select list)"""
         try:
             result = self.client.table('vod_downloads')\
-                .select('*')\
+                .select(columns)\
                 .eq('stream_id', stream_id)\
+                .limit(1)\
+                .maybe_single()\
                 .execute()
-            return result.data[0] if result.data else None
+            return result.data if result else None
         except Exception as e:
-            logger.error(f'❌ Error getting VOD download: {e}')
+            logger.error('❌ Error getting VOD download: %s', e)
             raise
     
-    def get_pending_downloads(self) -> List[Dict[str, Any]]:
-        """Get all pending VOD downloads"""
+    def get_pending_downloads(self, columns: str = '*, streams(*)') -> List[Dict[str, Any]]:
+        """Get all pending VOD downloads (columns narrows the select list)"""
         try:
             result = self.client.table('vod_downloads')\
-                .select('*, streams(*)')\
+                .select(columns)\
                 .eq('download_status', 'pending')\
                 .execute()
             return result.data
         except Exception as e:
-            logger.error(f'❌ Error getting pending downloads: {e}')
+            logger.error('❌ Error getting pending downloads: %s', e)
             raise
     
+    def iter_pending_downloads(self, page_size: int = 100,
+                               columns: str = '*, streams(*)') -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield pending VOD downloads one page at a time, keyed on id so rows
+        that leave 'pending' while the caller works don't shift later pages
+        
+        Args:
+            page_size: Rows fetched per request
+            columns: PostgREST select list (must include id)
+        
+        Yields:
+            Lists of up to page_size download records
+        """
+        last_id = None
+        while True:
+            try:
+                query = self.client.table('vod_downloads')\
+                    .select(columns)\
+                    .eq('download_status', 'pending')
+                if last_id is not None:
+                    query = query.gt('id', last_id)
+                result = query.order('id').limit(page_size).execute()
+            except Exception as e:
+                logger.error('❌ Error getting pending downloads: %s', e)
+                raise
+            
+            if result.data:
+                yield result.data
+            if len(result.data) < page_size:
+                break
+            last_id = result.data[-1]['id']
+    
+    def iter_completed_downloads(self, page_size: int = 200,
+                                 columns: str = '*, streams(*)') -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield completed VOD downloads (with stream data) that don't have a
+        youtube_uploads record yet, one page at a time
+        
+        Args:
+            page_size: Rows fetched per request
+            columns: PostgREST select list for the download and its embedded stream
+        
+        Yields:
+            Lists of up to page_size download records
+        """
+        offset = 0
+        while True:
+            try:
+                result = self.client.table('vod_downloads')\
+                    .select(f'{columns}, youtube_uploads(id)')\
+                    .eq('download_status', 'completed')\
+                    .is_('youtube_uploads', 'null')\
+                    .order('id')\
+                    .range(offset, offset + page_size - 1)\
+                    .execute()
+            except Exception as e:
+                logger.error('❌ Error getting completed downloads: %s', e)
+                raise
+            
+            if result.data:
+                yield result.data
+            if len(result.data) < page_size:
+                break
+            offset += page_size
+    
     def mark_download_started(self, download_id: str) -> Dict[str, Any]:
         """Mark download as started"""
         updates = {
             'download_status': 'downloading',
-            'download_started_at': datetime.now().isoformat()
+            'download_started_at': _now_iso()
         }
         return self.update_vod_download(download_id, updates)
     
@@ -181,7 +441,7 @@ class SupabaseClient:
         """Mark download as completed"""
         updates = {
             'download_status': 'completed',
-            'download_completed_at': datetime.now().isoformat(),
+            'download_completed_at': _now_iso(),
             'file_path': file_path,
             'file_size_mb': file_size_mb,
             'download_progress_percent': 100
@@ -196,6 +456,14 @@ class SupabaseClient:
         }
         return self.update_vod_download(download_id, updates)
     
+    def mark_downloads_failed(self, download_ids: List[str], error_message: str) -> List[Dict[str, Any]]:
+        """Mark several downloads as failed with the same error"""
+        updates = {
+            'download_status': 'failed',
+            'error_message': error_message
+        }
+        return self.bulk_update_vod_downloads(download_ids, updates)
+    
     # ==========================================
     # GAME METADATA TABLE OPERATIONS
     # ==========================================
@@ -206,10 +474,41 @@ class SupabaseClient:
             result = self.client.table('game_metadata')\
                 .select('*')\
                 .eq('game_name', game_name)\
+                .maybe_single()\
                 .execute()
-            return result.data[0] if result.data else None
+            return result.data if result else None
+        except Exception as e:
+            logger.error('❌ Error getting game metadata: %s', e)
+            raise
+    
+    def get_game_metadata_batch(self, game_names: List[str]) -> List[Dict[str, Any]]:
+        """Get cached game metadata for many names in one query"""
+        if not game_names:
+            return []
+        
+        try:
+            result = self.client.table('game_metadata')\
+                .select('*')\
+                .in_('game_name', game_names)\
+                .execute()
+            return result.data
+        except Exception as e:
+            logger.error('❌ Error getting game metadata batch: %s', e)
+            raise
+    
+    def get_game_names_by_twitch_ids(self, twitch_game_ids: List[str]) -> Dict[str, str]:
+        """Map Twitch game IDs to names using rows already cached in game_metadata"""
+        if not twitch_game_ids:
+            return {}
+        
+        try:
+            result = self.client.table('game_metadata')\
+                .select('twitch_game_id, game_name')\
+                .in_('twitch_game_id', twitch_game_ids)\
+                .execute()
+            return {row['twitch_game_id']: row['game_name'] for row in result.data}
         except Exception as e:
-            logger.error(f'❌ Error getting game metadata: {e}')
+            logger.error('❌ Error getting game names by Twitch ID: %s', e)
             raise
     
     def create_game_metadata(self, game_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -229,10 +528,91 @@ class SupabaseClient:
             result = self.client.table('game_metadata')\
                 .upsert(game_data, on_conflict='game_name')\
                 .execute()
-            logger.info(f'✅ Game metadata cached: {game_data.get("game_name")}')
+            logger.info('✅ Game metadata cached: %s', game_data.get('game_name'))
             return result.data[0] if result.data else None
         except Exception as e:
-            logger.error(f'❌ Error caching game metadata: {e}')
+            logger.error('❌ Error caching game metadata: %s', e)
+            raise
+    
+    def upsert_game_metadata_batch(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Create or update many game metadata cache rows in one request
+        
+        Args:
+            rows: List of game metadata dictionaries (see create_game_metadata)
+        
+        Returns:
+            List of created/updated game metadata records
+        """
+        if not rows:
+            return []
+        
+        # Postgres rejects an upsert that touches the same conflict key twice
+        unique_rows = list({row['game_name']: row for row in rows}.values())
+        
+        try:
+            result = self.client.table('game_metadata')\
+                .upsert(unique_rows, on_conflict='game_name')\
+                .execute()
+            logger.info('✅ Game metadata cached: %s games', len(unique_rows))
+            return result.data
+        except Exception as e:
+            logger.error('❌ Error caching game metadata batch: %s', e)
+            raise
+    
+    # ==========================================
+    # FAILED GAME LOOKUPS TABLE OPERATIONS
+    # ==========================================
+    
+    def get_failed_lookup(self, game_name: str) -> Optional[Dict[str, Any]]:
+        """Get an unexpired failed-lookup record for a game name"""
+        try:
+            result = self.client.table('failed_game_lookups')\
+                .select('expires_at')\
+                .eq('game_name', game_name)\
+                .gt('expires_at', _now_iso())\
+                .maybe_single()\
+                .execute()
+            return result.data if result else None
+        except Exception as e:
+            logger.error('❌ Error getting failed lookup: %s', e)
+            raise
+    
+    def get_failed_lookups_batch(self, game_names: List[str]) -> List[Dict[str, Any]]:
+        """Get unexpired failed-lookup records for many game names in one query"""
+        if not game_names:
+            return []
+        
+        try:
+            result = self.client.table('failed_game_lookups')\
+                .select('game_name, expires_at')\
+                .in_('game_name', game_names)\
+                .gt('expires_at', _now_iso())\
+                .execute()
+            return result.data
+        except Exception as e:
+            logger.error('❌ Error getting failed lookups batch: %s', e)
+            raise
+    
+    def create_failed_lookup(self, game_name: str, expires_at: datetime) -> Dict[str, Any]:
+        """
+        Record that no source had metadata for a game (negative cache)
+        
+        Args:
+            game_name: Game name that failed
+            expires_at: When the lookup may be retried
+        
+        Returns:
+            Created/updated failed lookup record
+        """
+        try:
+            result = self.client.table('failed_game_lookups')\
+                .upsert({'game_name': game_name, 'expires_at': expires_at.isoformat()}, on_conflict='game_name')\
+                .execute()
+            logger.info('✅ Failed lookup cached: %s', game_name)
+            return result.data[0] if result.data else None
+        except Exception as e:
+            logger.error('❌ Error caching failed lookup: %s', e)
             raise
     
     # ==========================================
@@ -253,10 +633,30 @@ class SupabaseClient:
         """
         try:
             result = self.client.table('youtube_uploads').insert(upload_data).execute()
-            logger.info(f'✅ YouTube upload record created for stream: {upload_data.get("stream_id")}')
+            logger.info('✅ YouTube upload record created for stream: %s', upload_data.get('stream_id'))
             return result.data[0] if result.data else None
         except Exception as e:
-            logger.error(f'❌ Error creating YouTube upload: {e}')
+            logger.error('❌ Error creating YouTube upload: %s', e)
+            raise
+    
+    def create_youtube_uploads_batch(self, uploads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Create many YouTube upload records in one insert
+
+        Args:
+            uploads: Upload dictionaries, same shape as create_youtube_upload
+
+        Returns:
+            List of created upload records
+        """
+        if not uploads:
+            return []
+        try:
+            result = self.client.table('youtube_uploads').insert(uploads).execute()
+            logger.info('✅ %s YouTube upload records created', len(result.data))
+            return result.data
+        except Exception as e:
+            logger.error('❌ Error creating YouTube upload records: %s', e)
             raise
     
     def update_youtube_upload(self, upload_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
@@ -266,29 +666,53 @@ class SupabaseClient:
                 .update(updates)\
                 .eq('id', upload_id)\
                 .execute()
-            logger.info(f'✅ YouTube upload updated: {upload_id}')
+            logger.info('✅ YouTube upload updated: %s', upload_id)
             return result.data[0] if result.data else None
         except Exception as e:
-            logger.error(f'❌ Error updating YouTube upload: {e}')
+            logger.error('❌ Error updating YouTube upload: %s', e)
             raise
     
-    def get_queued_uploads(self) -> List[Dict[str, Any]]:
-        """Get all queued YouTube uploads"""
+    def bulk_update_youtube_uploads(self, upload_ids: List[str], updates: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Apply the same update to many YouTube upload records in one request
+
+        Args:
+            upload_ids: Upload record IDs to update
+            updates: Column values to set on every record
+
+        Returns:
+            List of updated records
+        """
+        if not upload_ids:
+            return []
         try:
             result = self.client.table('youtube_uploads')\
-                .select('*, streams(*), vod_downloads(*)')\
+                .update(updates)\
+                .in_('id', upload_ids)\
+                .execute()
+            logger.info('✅ %s YouTube uploads updated', len(result.data))
+            return result.data
+        except Exception as e:
+            logger.error('❌ Error bulk updating YouTube uploads: %s', e)
+            raise
+    
+    def get_queued_uploads(self, columns: str = '*, streams(*), vod_downloads(*)') -> List[Dict[str, Any]]:
+        """Get all queued YouTube uploads (columns narrows the select list)"""
+        try:
+            result = self.client.table('youtube_uploads')\
+                .select(columns)\
                 .eq('upload_status', 'queued')\
                 .execute()
             return result.data
         except Exception as e:
-            logger.error(f'❌ Error getting queued uploads: {e}')
+            logger.error('❌ Error getting queued uploads: %s', e)
             raise
     
     def mark_upload_started(self, upload_id: str) -> Dict[str, Any]:
         """Mark upload as started"""
         updates = {
             'upload_status': 'uploading',
-            'upload_started_at': datetime.now().isoformat()
+            'upload_started_at': _now_iso()
         }
         return self.update_youtube_upload(upload_id, updates)
     
@@ -297,7 +721,7 @@ class SupabaseClient:
         """Mark upload as completed"""
         updates = {
             'upload_status': 'completed',
-            'upload_completed_at': datetime.now().isoformat(),
+            'upload_completed_at': _now_iso(),
             'youtube_video_id': youtube_video_id,
             'youtube_url': youtube_url,
             'upload_progress_percent': 100
@@ -325,7 +749,7 @@ class SupabaseClient:
                 .execute()
             return result.data
         except Exception as e:
-            logger.error(f'❌ Error getting pipeline status: {e}')
+            logger.error('❌ Error getting pipeline status: %s', e)
             raise
     
     def get_failed_operations(self) -> List[Dict[str, Any]]:
@@ -336,14 +760,30 @@ class SupabaseClient:
                 .execute()
             return result.data
         except Exception as e:
-            logger.error(f'❌ Error getting failed operations: {e}')
+            logger.error('❌ Error getting failed operations: %s', e)
             raise
 
 
+_instance: Optional[SupabaseClient] = None
+
+
+def get_supabase_client() -> SupabaseClient:
+    """
+    Get the process-wide Supabase client, creating it on first use
+
+    Returns:
+        Shared SupabaseClient instance
+    """
+    global _instance
+    if _instance is None:
+        _instance = SupabaseClient()
+    return _instance
+
+
 # Example usage and testing
 if __name__ == '__main__':
     # Initialize client
-    db = SupabaseClient()
+    db = get_supabase_client()
     
     print('\n' + '='*60)
     print('Testing Supabase Client')
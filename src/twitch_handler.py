@@ -9,31 +9,69 @@ Updated to check last 7 days for unprocessed VODs and process them in chronologi
 
 import traceback
 import os
+import time
+import asyncio
 import logging
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, ClassVar
+import httpx
 from twitchAPI.twitch import Twitch
 from twitchAPI.helper import first
 from dotenv import load_dotenv
 
 from twitchAPI.type import VideoType
-from src.supabase_client import SupabaseClient
+from src.supabase_client import SupabaseClient, get_supabase_client
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Helix VOD durations look like '2h30m15s' (each part optional, always in this order)
+_DURATION_UNITS = (('h', 3600), ('m', 60), ('s', 1))
+
+# How long the channel's current game is reused before asking Helix again
+CHANNEL_INFO_TTL_SECONDS = 60
+
+# Transient Helix failures are retried with exponential backoff
+HELIX_MAX_RETRIES = 2
+HELIX_RETRY_BACKOFF_SECONDS = 0.5
+HELIX_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Helix get_games accepts up to 100 IDs per request
+TWITCH_GAMES_PER_REQUEST = 100
+
+
+@lru_cache(maxsize=256)
+def _parse_twitch_ts(value: str) -> datetime:
+    """
+    Parse a Helix ISO-8601 timestamp, accepting the trailing 'Z' UTC marker
+
+    Args:
+        value: Timestamp string such as '2024-01-01T12:00:00Z'
+
+    Returns:
+        Timezone-aware datetime
+    """
+    if value[-1:] == 'Z':
+        return datetime.fromisoformat(value[:-1]).replace(tzinfo=timezone.utc)
+    return datetime.fromisoformat(value)
+
 
 class TwitchHandler:
     """Handler for daily Twitch VOD collection"""
     
+    # Authenticated Twitch clients shared by every handler in the process, keyed by client ID
+    _shared_clients: ClassVar[Dict[str, Twitch]] = {}
+    _auth_lock: ClassVar[Optional[asyncio.Lock]] = None
+    
     def __init__(self, db_client: Optional[SupabaseClient] = None):
         """
         Initialize Twitch Handler
         
         Args:
-            db_client: Optional SupabaseClient instance. If None, creates new one.
+            db_client: Optional SupabaseClient instance. If None, uses the shared one.
         """
         self.client_id = os.getenv('TWITCH_CLIENT_ID')
         self.client_secret = os.getenv('TWITCH_CLIENT_SECRET')
@@ -42,17 +80,31 @@ class TwitchHandler:
         if not self.client_id or not self.client_secret:
             raise ValueError("TWITCH_CLIENT_ID and TWITCH_CLIENT_SECRET must be set in .env")
         
-        self.twitch: Optional[Twitch] = None
         self.user_id: Optional[str] = None
-        self.db = db_client or SupabaseClient()
+        self.db = db_client or get_supabase_client()
+        
+        # (expires_at, (game_id, game_name)) from the last channel lookup
+        self._channel_game_cache: Optional[Tuple[float, Tuple[Optional[str], Optional[str]]]] = None
+        
+        # game_id -> game name, resolved once per process
+        self._game_name_cache: Dict[str, str] = {}
         
         logger.info(f'🎮 Twitch Handler initialized for user: {self.user_login}')
     
+    @property
+    def twitch(self) -> Optional[Twitch]:
+        """Shared Twitch client for these credentials, or None before authenticate()"""
+        return self._shared_clients.get(self.client_id)
+    
     async def authenticate(self):
-        """Authenticate with Twitch API"""
+        """Authenticate with Twitch API (reusing the shared client if one exists)"""
         try:
-            self.twitch = await Twitch(self.client_id, self.client_secret)
-            logger.info('✅ Twitch API authenticated')
+            if TwitchHandler._auth_lock is None:
+                TwitchHandler._auth_lock = asyncio.Lock()
+            async with TwitchHandler._auth_lock:
+                if self.twitch is None:
+                    TwitchHandler._shared_clients[self.client_id] = await Twitch(self.client_id, self.client_secret)
+                    logger.info('✅ Twitch API authenticated')
             
             # Get user ID for the configured user
             user = await first(self.twitch.get_users(logins=[self.user_login]))
@@ -80,9 +132,6 @@ class TwitchHandler:
             await self.authenticate()
         
         try:
-            import httpx
-            from datetime import timezone
-            
             cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
             vods = []
             
@@ -119,8 +168,18 @@ class TwitchHandler:
             }
             
             async with httpx.AsyncClient() as client:
-                url = f'https://api.twitch.tv/helix/videos?user_id={self.user_id}&first=20&type=archive'
-                response = await client.get(url, headers=headers)
+                url = f'https://api.twitch.tv/helix/videos?user_id={self.user_id}&first=100&type=archive&sort=time'
+                for attempt in range(HELIX_MAX_RETRIES + 1):
+                    try:
+                        response = await client.get(url, headers=headers)
+                    except httpx.TransportError:
+                        if attempt == HELIX_MAX_RETRIES:
+                            raise
+                    else:
+                        if response.status_code not in HELIX_RETRY_STATUSES or attempt == HELIX_MAX_RETRIES:
+                            break
+                    logger.warning(f'⚠️  Helix videos request failed, retrying ({attempt + 1}/{HELIX_MAX_RETRIES})...')
+                    await asyncio.sleep(HELIX_RETRY_BACKOFF_SECONDS * 2 ** attempt)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -128,7 +187,7 @@ class TwitchHandler:
                     # Parse created_at
                     vod_created_str = vod_raw.get('created_at')
                     if vod_created_str:
-                        vod_created = datetime.fromisoformat(vod_created_str.replace('Z', '+00:00'))
+                        vod_created = _parse_twitch_ts(vod_created_str)
                     else:
                         continue
                     
@@ -146,6 +205,7 @@ class TwitchHandler:
                         'url': vod_raw.get('url'),
                         'duration': vod_raw.get('duration'),
                         'created_at': vod_created.isoformat(),
+                        'created_at_dt': vod_created,
                         'view_count': vod_raw.get('view_count'),
                         'thumbnail_url': vod_raw.get('thumbnail_url'),
                         'description': vod_raw.get('description', ''),
@@ -154,7 +214,7 @@ class TwitchHandler:
                     }
                     
                     vods.append(vod_data)
-                    logger.info(f'📹 Found VOD: {vod_raw.get("id")} - {vod_raw.get("title")} (Game: {game_name or "Not Set"})')
+                    logger.debug(f'📹 Found VOD: {vod_raw.get("id")} - {vod_raw.get("title")} (Game: {game_name or "Not Set"})')
             
             logger.info(f'✅ Found {len(vods)} VODs from last {hours_back} hours')
             return vods
@@ -214,12 +274,14 @@ class TwitchHandler:
         Returns:
             Tuple of (game_id, game_name) or (None, None) if not found
         """
+        # Several VODs without game info in one run all ask for the same channel
+        if self._channel_game_cache and self._channel_game_cache[0] > time.monotonic():
+            return self._channel_game_cache[1]
+        
         if not self.twitch or not self.user_id:
             await self.authenticate()
         
         try:
-            import httpx
-            
             # Get OAuth token
             token = None
             for attr in ['_Twitch__app_auth_token', '_app_auth_token', 'app_auth_token', '_user_auth_token']:
@@ -253,49 +315,76 @@ class TwitchHandler:
                 )
                 response.raise_for_status()
                 data = response.json()
+            
+            game_info = (None, None)
+            if data.get('data') and len(data['data']) > 0:
+                channel_info = data['data'][0]
+                game_id = channel_info.get('game_id')
+                game_name = channel_info.get('game_name')
                 
-                if data.get('data') and len(data['data']) > 0:
-                    channel_info = data['data'][0]
-                    game_id = channel_info.get('game_id')
-                    game_name = channel_info.get('game_name')
-                    
-                    if game_id and game_name:
-                        logger.info(f'🎮 Channel game: {game_name} (ID: {game_id})')
-                        return game_id, game_name
+                if game_id and game_name:
+                    logger.info(f'🎮 Channel game: {game_name} (ID: {game_id})')
+                    game_info = (game_id, game_name)
             
-            return None, None
+            self._channel_game_cache = (time.monotonic() + CHANNEL_INFO_TTL_SECONDS, game_info)
+            return game_info
             
         except Exception as e:
             logger.error(f'❌ Error getting channel game info: {e}')
             return None, None
+    
+    async def get_game_names_from_ids(self, game_ids: List[str]) -> Dict[str, str]:
         """
-        Get exact game name from Twitch using game_id
+        Get exact game names from Twitch for several game_ids at once
         Uses: https://dev.twitch.tv/docs/api/reference#get-games
         
         Args:
-            game_id: Twitch game ID
+            game_ids: Twitch game IDs (duplicates are looked up once)
         
         Returns:
-            Game name or None if not found
+            Dictionary of game_id -> game name for the IDs Twitch knows
         """
-        if not self.twitch:
-            await self.authenticate()
+        missing = [game_id for game_id in dict.fromkeys(game_ids) if game_id not in self._game_name_cache]
         
-        try:
-            game_generator = self.twitch.get_games(game_ids=[game_id])
-            game = await first(game_generator)
+        # Games seen on earlier runs are already in game_metadata
+        if missing:
+            try:
+                self._game_name_cache.update(self.db.get_game_names_by_twitch_ids(missing))
+            except Exception as e:
+                logger.warning(f'⚠️  Could not read cached game names: {e}')
+            missing = [game_id for game_id in missing if game_id not in self._game_name_cache]
+        
+        if missing:
+            if not self.twitch:
+                await self.authenticate()
             
-            if game:
-                logger.info(f'🎮 Found game: {game.name} (ID: {game_id})')
-                return game.name
-            else:
-                logger.warning(f'⚠️  Game ID {game_id} not found')
-                return None
-                
-        except Exception as e:
-            logger.error(f'❌ Error getting game name for ID {game_id}: {e}')
-            return None
+            try:
+                for start in range(0, len(missing), TWITCH_GAMES_PER_REQUEST):
+                    async for game in self.twitch.get_games(game_ids=missing[start:start + TWITCH_GAMES_PER_REQUEST]):
+                        self._game_name_cache[game.id] = game.name
+                        logger.debug(f'🎮 Found game: {game.name} (ID: {game.id})')
+                found = sum(1 for game_id in missing if game_id in self._game_name_cache)
+                logger.info(f'🎮 Resolved {found}/{len(missing)} game names from Twitch')
+            except Exception as e:
+                logger.error(f'❌ Error getting game names for IDs {missing}: {e}')
         
+        return {game_id: self._game_name_cache[game_id] for game_id in game_ids if game_id in self._game_name_cache}
+    
+    async def get_game_name_from_id(self, game_id: str) -> Optional[str]:
+        """
+        Get exact game name from Twitch using game_id
+        
+        Args:
+            game_id: Twitch game ID
+        
+        Returns:
+            Game name or None if not found
+        """
+        game_name = (await self.get_game_names_from_ids([game_id])).get(game_id)
+        if not game_name:
+            logger.warning(f'⚠️  Game ID {game_id} not found')
+        return game_name
+    
     def parse_duration(self, duration) -> int:
         """
         Parse Twitch duration to seconds
@@ -307,35 +396,26 @@ class TwitchHandler:
         Returns:
             Duration in seconds
         """
-        import re
-        from datetime import timedelta
-        
         # If it's already a timedelta object, convert to seconds
         if isinstance(duration, timedelta):
             return int(duration.total_seconds())
         
         # If it's a string, parse it
         if isinstance(duration, str):
-            hours = 0
-            minutes = 0
-            seconds = 0
-            
-            # Extract hours
-            h_match = re.search(r'(\d+)h', duration)
-            if h_match:
-                hours = int(h_match.group(1))
-            
-            # Extract minutes
-            m_match = re.search(r'(\d+)m', duration)
-            if m_match:
-                minutes = int(m_match.group(1))
-            
-            # Extract seconds
-            s_match = re.search(r'(\d+)s', duration)
-            if s_match:
-                seconds = int(s_match.group(1))
-            
-            return hours * 3600 + minutes * 60 + seconds
+            total = 0
+            rest = duration.lower()
+            try:
+                for unit, multiplier in _DURATION_UNITS:
+                    part, found, tail = rest.partition(unit)
+                    if found:
+                        total += int(part) * multiplier
+                        rest = tail
+                if rest:
+                    raise ValueError(rest)
+            except ValueError:
+                logger.warning(f'⚠️  Unrecognized duration format: {duration}')
+                return 0
+            return total
         
         # If it's an integer, return as-is
         if isinstance(duration, int):
@@ -368,50 +448,61 @@ class TwitchHandler:
             logger.info(f'💤 No VODs found in last {days_back} days')
             return []
         
-        # Filter for unprocessed VODs
+        # Filter for unprocessed VODs (one query for the whole window)
+        existing_ids = self.db.get_existing_stream_ids([vod['twitch_vod_id'] for vod in vods])
         unprocessed_vods = []
         for vod in vods:
-            existing_stream = self.db.get_stream_by_twitch_id(vod['twitch_vod_id'])
-            if not existing_stream:
+            if vod['twitch_vod_id'] not in existing_ids:
                 unprocessed_vods.append(vod)
             else:
-                logger.info(f'⏭️  VOD already processed: {vod["twitch_vod_id"]} - {vod["title"]}')
+                logger.debug(f'⏭️  VOD already processed: {vod["twitch_vod_id"]} - {vod["title"]}')
+        
+        logger.info(f'📋 {len(vods)} VODs in window: {len(unprocessed_vods)} new, {len(vods) - len(unprocessed_vods)} already processed')
         
         if not unprocessed_vods:
             logger.info('✅ All VODs already processed')
             return []
         
         # Sort by created_at (oldest first) to process in chronological order
-        unprocessed_vods.sort(key=lambda v: v['created_at'])
+        unprocessed_vods.sort(key=lambda v: v['created_at_dt'])
         
-        logger.info(f'📋 Found {len(unprocessed_vods)} unprocessed VODs (processing oldest first):')
-        for i, vod in enumerate(unprocessed_vods, 1):
-            logger.info(f'   {i}. {vod["title"]} (ID: {vod["twitch_vod_id"]}, Created: {vod["created_at"]})')
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, vod in enumerate(unprocessed_vods, 1):
+                logger.debug(f'   {i}. {vod["title"]} (ID: {vod["twitch_vod_id"]}, Created: {vod["created_at"]})')
         
         new_vods = []
         
+        # Resolve names for VODs that only carry a game_id with one get_games call
+        game_names = await self.get_game_names_from_ids(
+            [vod['game_id'] for vod in unprocessed_vods if vod.get('game_id') and not vod.get('game_name')]
+        )
+        
+        # Stream rows to insert, and their VODs keyed by twitch_stream_id
+        stream_rows = []
+        vods_by_stream_id = {}
+        
         for vod in unprocessed_vods:
             try:
                 # Create new stream record
                 duration_seconds = self.parse_duration(vod['duration'])
                 
                 # Calculate stream start time from VOD created time and duration
-                vod_created = datetime.fromisoformat(vod['created_at'])
+                vod_created = vod['created_at_dt']
                 stream_started = vod_created
                 stream_ended = vod_created
 
                 # Get game_id and game_name from VOD
                 game_id = vod.get('game_id')
-                game_name = vod.get('game_name')
+                game_name = vod.get('game_name') or game_names.get(game_id)
 
                 # If VOD doesn't have game info, try to get from current channel settings
                 if not game_id or not game_name:
-                    logger.info(f'🔍 VOD missing game info, fetching from channel...')
+                    logger.debug('🔍 VOD missing game info, fetching from channel...')
                     channel_game_id, channel_game_name = await self.get_channel_game_info()
                     if channel_game_id and channel_game_name:
                         game_id = channel_game_id
                         game_name = channel_game_name
-                        logger.info(f'✅ Using channel game: {game_name}')
+                        logger.debug(f'✅ Using channel game: {game_name}')
                     else:
                         logger.warning(f'⚠️  Could not determine game for VOD {vod["twitch_vod_id"]}')
                 
@@ -428,34 +519,55 @@ class TwitchHandler:
                     'stream_status': 'vod_available'
                 }
                 
-                # Create stream record
-                stream_record = self.db.create_stream(stream_data)
-                logger.info(f'✅ Stream record created: {stream_record["id"]}')
-                
-                # Create download task
-                download_record = self.db.create_vod_download(stream_record['id'])
-                logger.info(f'✅ Download task created: {download_record["id"]}')
-                
-                new_vods.append({
-                    'stream': stream_record,
-                    'download': download_record,
-                    'vod': vod
-                })
-                
-                logger.info(f'🎉 Successfully processed VOD: {vod["title"]} ({vod["twitch_vod_id"]})')
+                stream_rows.append(stream_data)
+                vods_by_stream_id[stream_data['twitch_stream_id']] = vod
                 
             except Exception as e:
                 logger.error(f'❌ Error processing VOD {vod.get("twitch_vod_id")}: {e}')
                 traceback.print_exc()
                 continue
         
+        # Create stream records, then their download tasks, in two inserts for the whole batch
+        try:
+            stream_records = self.db.bulk_create_streams(stream_rows)
+        except Exception as e:
+            logger.error(f'❌ Error creating stream records: {e}')
+            traceback.print_exc()
+            return []
+        
+        stream_ids = [stream['id'] for stream in stream_records]
+        try:
+            download_records = self.db.bulk_create_vod_downloads(stream_ids)
+        except Exception as e:
+            logger.error(f'❌ Error creating download tasks: {e}')
+            traceback.print_exc()
+            # Streams without downloads would look already processed next run, so undo them
+            try:
+                self.db.delete_streams(stream_ids)
+                logger.info(f'↩️  Rolled back {len(stream_ids)} stream records, they will be retried next run')
+            except Exception as rollback_error:
+                logger.error(f'❌ Rollback failed, streams left without downloads: {stream_ids} ({rollback_error})')
+            return []
+        
+        downloads_by_stream = {download['stream_id']: download for download in download_records}
+        for stream_record in stream_records:
+            vod = vods_by_stream_id[stream_record['twitch_stream_id']]
+            new_vods.append({
+                'stream': stream_record,
+                'download': downloads_by_stream.get(stream_record['id']),
+                'vod': vod
+            })
+            
+            logger.debug(f'🎉 Successfully processed VOD: {vod["title"]} ({vod["twitch_vod_id"]})')
+        
         logger.info(f'🎉 Successfully processed {len(new_vods)} new VODs out of {len(unprocessed_vods)} found')
         return new_vods
     
     async def close(self):
-        """Clean up resources"""
-        if self.twitch:
-            await self.twitch.close()
+        """Close the shared Twitch client (other handlers re-authenticate on next use)"""
+        twitch = self._shared_clients.pop(self.client_id, None)
+        if twitch:
+            await twitch.close()
             logger.info('👋 Twitch client closed')
 
 
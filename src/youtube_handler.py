@@ -6,13 +6,14 @@ and Twitch stream information. Creates youtube_uploads records ready for upload.
 """
 
 import os
+import re
 import logging
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
-from src.supabase_client import SupabaseClient
-from game_metadata_handler import GameMetadataHandler
+from src.supabase_client import SupabaseClient, get_supabase_client
+from game_metadata_handler import GameMetadataHandler, DEFAULT_GAME_NAME
 from email_notifier import EmailNotifier
 
 load_dotenv()
@@ -20,6 +21,9 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Anything that isn't a letter or digit (spaces, punctuation, underscores)
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+
 
 class YouTubeHandler:
     """Handles YouTube metadata creation and upload preparation"""
@@ -31,7 +35,7 @@ class YouTubeHandler:
         Args:
             db_client: Optional SupabaseClient instance
         """
-        self.db = db_client or SupabaseClient()
+        self.db = db_client or get_supabase_client()
         self.metadata_handler = GameMetadataHandler(db_client)
         self.email_notifier = EmailNotifier()
         
@@ -58,11 +62,8 @@ class YouTubeHandler:
         Returns:
             Formatted hashtag (e.g., "Dead Space" → "DeadSpace")
         """
-        # Remove special characters and spaces
-        formatted = ''.join(c for c in game_name if c.isalnum() or c == ' ')
-        # Remove spaces (CamelCase style)
-        formatted = formatted.replace(' ', '')
-        return formatted
+        # Remove special characters and spaces (CamelCase style)
+        return _NON_ALNUM_RE.sub('', game_name)
     
     def build_description(self, stream_title: str, game_name: str, 
                          game_metadata: Optional[Dict[str, Any]],
@@ -231,13 +232,14 @@ class YouTubeHandler:
         logger.info('🚀 Processing downloads for YouTube metadata...')
         
         try:
-            # Get completed downloads that don't have upload records yet
-            result = self.db.client.table('vod_downloads')\
-                .select('*, streams(*)')\
-                .eq('download_status', 'completed')\
-                .execute()
-            
-            completed_downloads = result.data
+            # Get completed downloads that don't have upload records yet (anti-joined
+            # server-side, paged). All pages are read before any record is inserted,
+            # so the offsets don't shift under us.
+            completed_downloads = [
+                item
+                for page in self.db.iter_completed_downloads()
+                for item in page
+            ]
             
             if not completed_downloads:
                 logger.info('💤 No completed downloads to process')
@@ -245,19 +247,16 @@ class YouTubeHandler:
             
             stats = {'processed': 0, 'success': 0, 'failed': 0}
             
+            # Every record created in this run shares the same publish slot
+            scheduled_publish_at = self.calculate_publish_time(datetime.now())
+            
+            # Upload records and their manual review alerts, written in one insert below
+            pending_uploads = []
+            
             for item in completed_downloads:
-                download_record = {k: v for k, v in item.items() if k != 'streams'}
-                stream_record = item['streams']
-                
-                # Check if already has upload record
-                existing_upload = self.db.client.table('youtube_uploads')\
-                    .select('id')\
-                    .eq('vod_download_id', download_record['id'])\
-                    .execute()
-                
-                if existing_upload.data:
-                    logger.info(f'⏭️  Download {download_record["id"]} already has upload record')
-                    continue
+                stream_record = item.pop('streams')
+                item.pop('youtube_uploads', None)
+                download_record = item
                 
                 stats['processed'] += 1
                 
@@ -265,7 +264,7 @@ class YouTubeHandler:
                     # Get game name from Twitch metadata
                     game_name = stream_record.get('game_name')
                     if not game_name or game_name.strip() == '':
-                        game_name = 'Games + Demos'
+                        game_name = DEFAULT_GAME_NAME
                     
                     logger.info(f'📺 Processing: {stream_record["title"]}')
                     logger.info(f'   Game: {game_name}')
@@ -307,10 +306,6 @@ class YouTubeHandler:
                         
                         logger.warning(f'⚠️  Metadata failed for {game_name}')
                     
-                    # Calculate publish time (6 PM same/next day)
-                    upload_time = datetime.now()
-                    scheduled_publish_at = self.calculate_publish_time(upload_time)
-                    
                     # Get thumbnail URL from Twitch VOD
                     # Twitch thumbnail template: https://static-cdn.jtvnw.net/previews-ttv/offset-{twitch_vod_id}-320x180.jpg
                     twitch_vod_id = stream_record.get('twitch_vod_id')
@@ -335,27 +330,38 @@ class YouTubeHandler:
                         'scheduled_publish_at': scheduled_publish_at.isoformat()
                     }
                     
-                    youtube_record = self.db.create_youtube_upload(upload_data)
-                    logger.info(f'✅ YouTube upload record created: {youtube_record["id"]}')
-                    logger.info(f'   Scheduled publish: {scheduled_publish_at.strftime("%Y-%m-%d %I:%M %p")}')
-                    
-                    # If metadata failed, send email notification
+                    alert = None
                     if manual_review:
-                        logger.info('📧 Sending manual review notification...')
-                        self.email_notifier.send_metadata_failure_alert(
-                            stream_title=stream_record['title'],
-                            game_name=game_name,
-                            twitch_vod_id=twitch_vod_id,
-                            youtube_url=None  # Video not uploaded yet
-                        )
-                    
-                    stats['success'] += 1
+                        alert = {
+                            'stream_title': stream_record['title'],
+                            'game_name': game_name,
+                            'twitch_vod_id': twitch_vod_id,
+                            'youtube_url': None  # Video not uploaded yet
+                        }
+                    pending_uploads.append((upload_data, alert))
                     
                 except Exception as e:
                     logger.error(f'❌ Error processing download {download_record["id"]}: {e}')
                     stats['failed'] += 1
                     continue
             
+            # Create all upload records in a single insert
+            if pending_uploads:
+                try:
+                    self.db.create_youtube_uploads_batch([upload for upload, _ in pending_uploads])
+                    logger.info(f'   Scheduled publish: {scheduled_publish_at.strftime("%Y-%m-%d %I:%M %p")}')
+                    stats['success'] += len(pending_uploads)
+                except Exception as e:
+                    logger.error(f'❌ Error creating YouTube upload records: {e}')
+                    stats['failed'] += len(pending_uploads)
+                    pending_uploads = []
+            
+            # If metadata failed, send email notification
+            for _, alert in pending_uploads:
+                if alert:
+                    logger.info('📧 Sending manual review notification...')
+                    self.email_notifier.send_metadata_failure_alert(**alert)
+            
             logger.info(f'🎉 YouTube metadata processing complete!')
             logger.info(f'   Processed: {stats["processed"]}')
             logger.info(f'   Success: {stats["success"]}')
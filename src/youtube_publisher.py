@@ -16,13 +16,16 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
 
-from src.supabase_client import SupabaseClient
+from src.supabase_client import SupabaseClient, get_supabase_client
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Only the youtube_uploads columns the publish loop reads
+PUBLISH_COLUMNS = 'id, youtube_video_id, youtube_url, video_title, scheduled_publish_at, manual_review_required'
+
 
 class YouTubePublisher:
     """Handles publishing YouTube videos (changing privacy status)"""
@@ -34,7 +37,7 @@ class YouTubePublisher:
         Args:
             db_client: Optional SupabaseClient instance
         """
-        self.db = db_client or SupabaseClient()
+        self.db = db_client or get_supabase_client()
         
         # YouTube API credentials
         self.credentials_file = os.getenv('YOUTUBE_CREDENTIALS_FILE', 'client_secret.json')
@@ -140,7 +143,7 @@ class YouTubePublisher:
             # 3. Scheduled publish time is within window
             # 4. Metadata status = ready (skip manual review videos)
             result = self.db.client.table('youtube_uploads')\
-                .select('*')\
+                .select(PUBLISH_COLUMNS)\
                 .eq('upload_status', 'completed')\
                 .eq('privacy_status', 'private')\
                 .eq('metadata_status', 'ready')\
@@ -185,6 +188,8 @@ class YouTubePublisher:
         
         stats = {'processed': 0, 'success': 0, 'failed': 0, 'skipped': 0}
         
+        published_ids = []
+        
         for upload_record in videos:
             stats['processed'] += 1
             upload_id = upload_record['id']
@@ -207,12 +212,8 @@ class YouTubePublisher:
                 success = self.publish_video(video_id, upload_record)
                 
                 if success:
-                    # Update database - change privacy status to public
-                    self.db.update_youtube_upload(upload_id, {
-                        'privacy_status': 'public',
-                        'updated_at': datetime.now().isoformat()
-                    })
-                    
+                    # Database update is batched after the loop
+                    published_ids.append(upload_id)
                     stats['success'] += 1
                     logger.info(f'✅ Published: {upload_record["youtube_url"]}')
                 else:
@@ -224,6 +225,16 @@ class YouTubePublisher:
                 stats['failed'] += 1
                 continue
         
+        # Mark every published video public in a single update
+        if published_ids:
+            try:
+                self.db.bulk_update_youtube_uploads(published_ids, {
+                    'privacy_status': 'public',
+                    'updated_at': datetime.now().isoformat()
+                })
+            except Exception as e:
+                logger.error(f'❌ Error marking published videos public: {e}')
+        
         logger.info(f'🎉 Publishing complete!')
         logger.info(f'   Processed: {stats["processed"]}')
         logger.info(f'   Published: {stats["success"]}')
@@ -246,7 +257,7 @@ class YouTubePublisher:
         try:
             # Get upload record
             result = self.db.client.table('youtube_uploads')\
-                .select('*')\
+                .select(PUBLISH_COLUMNS)\
                 .eq('id', upload_id)\
                 .execute()
             
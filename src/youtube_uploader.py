@@ -20,7 +20,7 @@ import boto3
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
-from src.supabase_client import SupabaseClient
+from src.supabase_client import SupabaseClient, get_supabase_client
 from email_notifier import EmailNotifier
 
 load_dotenv()
@@ -28,6 +28,13 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Only the columns the upload loop reads, including the embedded download and stream
+QUEUED_UPLOAD_COLUMNS = (
+    'id, video_title, video_description, video_tags, category_id, privacy_status, '
+    'scheduled_publish_at, thumbnail_url, manual_review_required, '
+    'vod_downloads(file_path, streams(title, game_name, twitch_vod_id))'
+)
+
 
 class YouTubeUploader:
     """Handles uploading videos to YouTube"""
@@ -39,7 +46,7 @@ class YouTubeUploader:
         Args:
             db_client: Optional SupabaseClient instance
         """
-        self.db = db_client or SupabaseClient()
+        self.db = db_client or get_supabase_client()
         self.email_notifier = EmailNotifier()
         
         # YouTube API credentials
@@ -288,7 +295,7 @@ class YouTubeUploader:
         try:
             # Get queued uploads with vod_downloads and streams data
             queued = self.db.client.table('youtube_uploads')\
-                .select('*, vod_downloads(*, streams(*))')\
+                .select(QUEUED_UPLOAD_COLUMNS)\
                 .eq('upload_status', 'queued')\
                 .execute()
             